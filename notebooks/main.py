@@ -1,9 +1,10 @@
 import sys
 import argparse
+from typing import Optional
 
 sys.path.append('../src')
 
-from document import Document, ParallelProcessor
+from document import Document, ParallelProcessor, PageCache
 from page import Page
 from page.extractors import TextExtractor, TableExtractor, LinkExtractor, ImageExtractor, TitleExtractor
 from report import Checker, Reporter
@@ -12,12 +13,19 @@ import fitz
 
 def analyze_document_pipeline(pdf_path: str, output_json_path: str = "analysis_results.json", 
                     images_dir: str = "images", resolved: bool = False, verbose: bool = False, 
-                    weights_dir: str = "weights"):
-    """Анализ PDF документа с проверками качества."""
+                    weights_dir: str = "weights", cache_path: Optional[str] = None):
+    """Анализ PDF документа с проверками качества.
+    Если задан cache_path, результаты страниц кэшируются в SQLite по хешу содержимого PDF.
+    """
     
-    with Document(pdf_path) as doc:
-        results = doc.analyze_document(images_dir=images_dir, resolved=resolved, verbose=verbose, weights_dir=weights_dir)
-        doc.analyze_and_save_json(output_json_path, images_dir=images_dir, resolved=resolved, verbose=verbose, weights_dir=weights_dir)
+    cache = PageCache(cache_path) if cache_path else None
+    try:
+        with Document(pdf_path) as doc:
+            results = doc.analyze_document(images_dir=images_dir, resolved=resolved, verbose=verbose, weights_dir=weights_dir, cache=cache)
+            doc.analyze_and_save_json(output_json_path, results, images_dir=images_dir, resolved=resolved, verbose=verbose, weights_dir=weights_dir)
+    finally:
+        if cache is not None:
+            cache.close()
     
     checker = Checker()
     reporter = Reporter()
@@ -45,6 +53,8 @@ def main():
                        help='Подробный вывод')
     parser.add_argument('--weights', '-w', default='weights', 
                        help='Папка с весами моделей')
+    parser.add_argument('--cache', nargs='?', const='analysis_cache.db', default=None,
+                       help='Кэшировать результаты страниц в SQLite (по умолчанию analysis_cache.db)')
     
     args = parser.parse_args()
 
@@ -55,7 +65,8 @@ def main():
             images_dir=args.images,
             resolved=args.resolved,
             verbose=args.verbose,
-            weights_dir=args.weights
+            weights_dir=args.weights,
+            cache_path=args.cache
         )
         
         if check_results['all_ok']:
@@ -1,16 +1,39 @@
 import re
 import os
+import functools
+from typing import Optional, Tuple
 
-_URL_RE = re.compile(r"(https?://[^\s]+|www\.[^\s]+)")
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+
+def _compile(pattern: str, flags: int = 0):
+    """Скомпилировать шаблон через RE2 (DFA, линейное время), если он установлен.
+    Шаблоны с флагами re и конструкциями, которых нет в RE2, компилируются через re.
+    """
+    if re2 is not None and not flags:
+        try:
+            return re2.compile(pattern)
+        except Exception:
+            pass
+    return re.compile(pattern, flags)
+
+
+# Пробельные символы, которые \s находит в str-шаблонах re. В RE2 \s совпадает только
+# с ASCII-пробелами, поэтому для одинакового поведения обоих движков класс задаётся явно.
+_UNICODE_SPACES = "\t-\r\x1c- \x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000"
+_URL_PATTERN = f"(https?://[^{_UNICODE_SPACES}]+|www\\.[^{_UNICODE_SPACES}]+)"
+_URL_RE = _compile(_URL_PATTERN)
 TOC_WORDS_RE = re.compile(r"\b(содержание|введение)\b", re.IGNORECASE)
 Appendix_WORDS_RE = re.compile(r"\b(приложение)\b", re.IGNORECASE)
-LETTER_PATTERN = re.compile(r'приложение\s*[а-яёa-z]', re.IGNORECASE)
-NUMBER_PATTERN = re.compile(r'приложение\s*\d+', re.IGNORECASE)
-SIMPLE_PATTERN = re.compile(r'приложение', re.IGNORECASE)
-_NUMBERED_PARAGRAPH_RE = re.compile(r"^\s*\d+\.\d+(?:\.\d+)*\s+")
+APPENDIX_RE = re.compile(r"(?<!\w)приложение(?:(?=\s*(?P<letter>[а-яёa-z]))|(?=\s*(?P<num>\d)))?", re.IGNORECASE | re.UNICODE)
+_NUMBERED_PARAGRAPH_RE = re.compile(r"\d+\.\d+(?:\.\d+)*\s+")
 _E_RESOURCE_RE = re.compile(r"электрон\w*\.?\s*ресурс\w*", re.IGNORECASE)
 
 DEFAULT_DPI = 300
+DEFAULT_LAYOUT_MODEL = "prima"
 
 def get_model_configs(weights_dir: str = "weights") -> dict:
     """Получить конфигурации моделей с относительными путями к весам."""
@@ -42,3 +65,33 @@ def get_model_configs(weights_dir: str = "weights") -> dict:
 
 MODEL_CONFIGS = get_model_configs()
 
+
+def get_layout_model(name: str = DEFAULT_LAYOUT_MODEL, weights_dir: str = "weights", extra_config: Tuple[str, ...] = (),
+                     device: Optional[str] = None) -> "lp.Detectron2LayoutModel":
+    """Получить модель layout; веса загружаются один раз на процесс.
+    device=None — GPU, если он доступен, иначе CPU. На GPU включаются TF32-матричные операции.
+    """
+    return _load_layout_model(name, weights_dir, tuple(extra_config), device)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_layout_model(name: str, weights_dir: str, extra_config: Tuple[str, ...], device: Optional[str]) -> "lp.Detectron2LayoutModel":
+    """Загрузка модели layout; кэш по позиционным аргументам, поэтому вызывается только из get_layout_model."""
+    import layoutparser as lp
+
+    model_configs = get_model_configs(weights_dir)
+    if name not in model_configs:
+        raise ValueError(f"Unknown model name: {name}. Available: {list(model_configs.keys())}")
+    cfg = model_configs[name]
+    model = lp.models.Detectron2LayoutModel(
+        config_path=cfg["config_path"],
+        label_map=cfg["label_map"],
+        extra_config=list(extra_config),
+        model_path=cfg.get("weights_path"),
+        device=device
+    )
+    if str(model.cfg.MODEL.DEVICE).startswith("cuda"):
+        import torch
+        torch.backends.cuda.matmul.allow_tf32 = True
+        torch.backends.cudnn.allow_tf32 = True
+    return model
@@ -1,4 +1,5 @@
 from .document import Document
 from .parallel_processor import ParallelProcessor
+from .cache import PageCache
 
-__all__ = ['Document', 'ParallelProcessor']
+__all__ = ['Document', 'ParallelProcessor', 'PageCache']
@@ -0,0 +1,71 @@
+import hashlib
+import sqlite3
+from typing import Any, Dict
+
+from utils.utils import dumps_json, loads_json
+
+DEFAULT_CACHE_PATH = "analysis_cache.db"
+
+
+class PageCache:
+    """Кэш результатов анализа страниц в SQLite.
+    Ключ — хеш содержимого PDF, номер страницы, режим анализа, папка весов и папка изображений.
+    """
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "hash TEXT, page_idx INTEGER, resolved INTEGER, weights TEXT, images_dir TEXT, json BLOB, "
+            "PRIMARY KEY (hash, page_idx, resolved, weights, images_dir))"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+        """SHA-256 содержимого файла, читаемого блоками."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _key(resolved: bool, weights_dir: str, images_dir: str):
+        """Часть ключа, зависящая от параметров анализа; веса важны только в resolved режиме."""
+        return int(resolved), weights_dir if resolved else "", images_dir
+
+    def get_pages(self, pdf_hash: str, *, resolved: bool, weights_dir: str, images_dir: str) -> Dict[int, Dict[str, Any]]:
+        """Все закэшированные результаты документа: {номер страницы: результат}."""
+        rows = self._conn.execute(
+            "SELECT page_idx, json FROM pages WHERE hash = ? AND resolved = ? AND weights = ? AND images_dir = ?",
+            (pdf_hash, *self._key(resolved, weights_dir, images_dir)),
+        )
+        return {idx: loads_json(blob) for idx, blob in rows}
+
+    def put_page(self, pdf_hash: str, page_idx: int, result: Dict[str, Any], *, resolved: bool, weights_dir: str, images_dir: str) -> None:
+        """Сохранить результат анализа страницы."""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (pdf_hash, page_idx, *self._key(resolved, weights_dir, images_dir), dumps_json(result)),
+            )
+
+    def clear(self) -> None:
+        """Удалить все записи кэша."""
+        with self._conn:
+            self._conn.execute("DELETE FROM pages")
+
+    def __enter__(self):
+        """Вход в контекстный менеджер."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Выход из контекстного менеджера."""
+        self.close()
+
+    def close(self):
+        """Закрыть соединение с базой."""
+        if self._conn:
+            self._conn.close()
+            self._conn = None
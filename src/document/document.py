@@ -1,9 +1,205 @@
 import os
-import json
+import sys
+import mmap
+import logging
+import multiprocessing
+import traceback
 import fitz
-from typing import List, Dict, Any, Optional
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
 from PIL import Image
-from page.page import Page
+from page.page import Page, _get_layout_analyzer
+from page.extractors import PageContentCache, TextExtractor, TableExtractor, LinkExtractor, ImageExtractor
+from config.model_config import DEFAULT_DPI, get_layout_model
+from utils.utils import dumps_json, save_images_as_pdf
+from document.cache import PageCache
+
+DEFAULT_WORKERS = min(os.cpu_count() or 1, 4)
+RENDER_BATCH_SIZE = 4
+
+
+def _render_pages(doc: fitz.Document, page_indices: Sequence[int], arena: Optional[np.ndarray] = None, dpi: int = DEFAULT_DPI) -> Tuple[List[np.ndarray], np.ndarray]:
+    """Отрендерить страницы в RGB-массивы (H, W, 3), лежащие в одном непрерывном буфере.
+    Буфер arena переиспользуется между вызовами и растёт только при необходимости.
+    """
+    matrix = fitz.Matrix(dpi / 72.0, dpi / 72.0)
+    shapes = []
+    for i in page_indices:
+        irect = (doc[i].rect * matrix).irect
+        shapes.append((irect.height, irect.width))
+    total = sum(h * w * 3 for h, w in shapes)
+    if arena is None or arena.size < total:
+        arena = np.empty(total, dtype=np.uint8)
+
+    images: List[np.ndarray] = []
+    offset = 0
+    for i, (h, w) in zip(page_indices, shapes):
+        pix = doc[i].get_pixmap(matrix=matrix, alpha=False)
+        samples = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
+        if samples.shape == (h, w, 3):
+            view = arena[offset:offset + h * w * 3].reshape(h, w, 3)
+            view[...] = samples
+            images.append(view)
+        else:
+            images.append(samples.copy())
+        offset += h * w * 3
+    return images, arena
+
+
+def _open_pdf(pdf_path: str) -> Tuple[fitz.Document, Optional[memoryview]]:
+    """Открыть PDF поверх отображения файла в память (mmap).
+    Страницы читаются из кэша страниц ядра, а не копируются в буфер процесса.
+    Возвращает документ и представление памяти, которое нужно передать в _close_pdf.
+    """
+    try:
+        fd = os.open(pdf_path, os.O_RDONLY)
+        try:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+    except (OSError, ValueError):
+        return fitz.open(pdf_path), None
+    view = memoryview(mm)
+    try:
+        return fitz.open(stream=view, filetype="pdf"), view
+    except TypeError:
+        # PyMuPDF до 1.24 принимает stream только как bytes, bytearray или BytesIO.
+        view.release()
+        mm.close()
+        return fitz.open(pdf_path), None
+    except Exception:
+        view.release()
+        mm.close()
+        raise
+
+
+def _close_pdf(doc: fitz.Document, view: Optional[memoryview]) -> None:
+    """Закрыть документ, открытый через _open_pdf, и освободить отображение файла."""
+    doc.close()
+    if view is not None:
+        mm = view.obj
+        view.release()
+        mm.close()
+
+
+_WORKER_DOCS: Dict[str, Tuple[fitz.Document, Optional[memoryview]]] = {}
+# Изображения, уже сохранённые воркером для открытого в нём документа (см. ImageExtractor.extract_images).
+_WORKER_SAVED_IMAGES: Dict[Tuple[str, int], Tuple[str, int, int, str]] = {}
+
+
+def _worker_document(pdf_path: str) -> fitz.Document:
+    """Документ, открытый в текущем процессе-воркере; открывается один раз на процесс.
+    Воркер держит открытым только последний запрошенный документ: пул может переиспользоваться
+    для разных файлов, и ранее открытые документы закрываются.
+    """
+    if pdf_path not in _WORKER_DOCS:
+        while _WORKER_DOCS:
+            _close_pdf(*_WORKER_DOCS.popitem()[1])
+        _WORKER_SAVED_IMAGES.clear()
+        _WORKER_DOCS[pdf_path] = _open_pdf(pdf_path)
+    return _WORKER_DOCS[pdf_path][0]
+
+
+def _pool_context() -> Optional[multiprocessing.context.BaseContext]:
+    """Контекст пула процессов: fork на Linux, чтобы воркеры наследовали уже
+    импортированные модули (layoutparser, torch) вместо повторного импорта."""
+    return multiprocessing.get_context("fork") if sys.platform.startswith("linux") else None
+
+
+def _preload_models(weights_dir: str) -> None:
+    """Инициализатор воркера: загрузить модель layout один раз на процесс."""
+    try:
+        get_layout_model(weights_dir=weights_dir)
+    except Exception as exc:
+        logging.warning("Failed to preload layout model from %s: %s", weights_dir, exc)
+
+
+def _init_worker(resolved: bool, weights_dir: str, pdf_path: Optional[str]) -> None:
+    """Инициализатор воркера: загрузить модель (в resolved режиме) и открыть PDF один раз на процесс."""
+    if resolved:
+        _preload_models(weights_dir)
+    if pdf_path is not None:
+        try:
+            _worker_document(pdf_path)
+        except Exception as exc:
+            logging.warning("Failed to open %s in worker: %s", pdf_path, exc)
+
+
+def _create_executor(workers: int, resolved: bool, weights_dir: str, pdf_path: Optional[str] = None) -> ProcessPoolExecutor:
+    """Создать пул процессов; в resolved режиме каждый воркер загружает модель один раз при старте.
+    Если задан pdf_path, каждый воркер заранее открывает этот документ.
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(), initializer=_init_worker, initargs=(resolved, weights_dir, pdf_path))
+
+
+def _page_error(page_index: int, exc: Exception, verbose: bool = False) -> Dict[str, Any]:
+    """Результат-маркер ошибки анализа страницы: {"__error__", "traceback", "page_number"}.
+    Трассировка форматируется только при verbose, иначе в поле "traceback" — None.
+    """
+    logging.debug("Page analysis failed [page %d]: %s", page_index, exc)
+    return {"__error__": f"{type(exc).__name__}: {exc}", "traceback": traceback.format_exc() if verbose else None, "page_number": page_index}
+
+
+def _is_error(res: Dict[str, Any]) -> bool:
+    """Является ли результат маркером ошибки."""
+    return "__error__" in res
+
+
+def _worker_analyze_page(pdf_path: str, page_index: int, images_dir: str, resolved: bool, weights_dir: str, collect_vis: bool, verbose: bool = False) -> Tuple[int, Dict[str, Any], Optional[Image.Image]]:
+    """Воркер для анализа одной страницы в отдельном процессе; документ открывается один раз на воркер."""
+    try:
+        doc = _worker_document(pdf_path)
+        vis_images: Optional[List[Image.Image]] = [] if collect_vis else None
+        page_image = _render_pages(doc, [page_index])[0][0] if resolved else None
+        res = Page(pdf_path, page_index, doc=doc, saved_images=_WORKER_SAVED_IMAGES).analyze_page(doc, images_dir=images_dir, resolved=resolved, vis_images=vis_images, weights_dir=weights_dir, page_image=page_image)
+        return page_index, res, vis_images[0] if vis_images else None
+    except Exception as exc:
+        return page_index, _page_error(page_index, exc, verbose), None
+
+
+def _worker_extract_page(pdf_path: str, page_index: int, images_dir: str, verbose: bool = False) -> Dict[str, Any]:
+    """Воркер: выполнить все экстракторы для одной страницы; документ открывается один раз на воркер."""
+    try:
+        page = _worker_document(pdf_path)[page_index]
+        cache = PageContentCache(page)
+        tables_data, table_bboxes = TableExtractor(page, cache).extract_tables()
+        text_extractor = TextExtractor(page, cache)
+        image_extractor = ImageExtractor(page, cache)
+        return {
+            "page_number": page_index,
+            "text_blocks": text_extractor.get_structured_blocks(table_bboxes),
+            "tables": tables_data,
+            "links": LinkExtractor(page, cache).extract_links(text_extractor.get_text_dict()),
+            "image_captions": image_extractor.extract_captions(),
+            "images": image_extractor.extract_images(images_dir, _WORKER_SAVED_IMAGES),
+        }
+    except Exception as exc:
+        return _page_error(page_index, exc, verbose)
+
+
+def extract_pages_parallel(pdf_path: str, page_indices: Optional[Iterable[int]] = None, images_dir: str = "images",
+                           num_workers: int = DEFAULT_WORKERS, *, verbose: bool = False) -> List[Dict[str, Any]]:
+    """Извлечь текст, таблицы, ссылки, подписи и изображения страниц в пуле процессов (без анализа макета).
+    Результаты возвращаются в порядке page_indices, страницы с ошибкой — как {"__error__", "traceback", "page_number"}.
+    """
+    if page_indices is None:
+        doc, view = _open_pdf(pdf_path)
+        try:
+            page_indices = range(doc.page_count)
+        finally:
+            _close_pdf(doc, view)
+    page_indices = list(page_indices)
+    if not page_indices:
+        return []
+
+    workers = max(1, min(num_workers, len(page_indices)))
+    chunksize = max(1, len(page_indices) // (workers * 4))
+    with _create_executor(workers, False, "weights", pdf_path) as executor:
+        return list(executor.map(_worker_extract_page, repeat(pdf_path), page_indices, repeat(images_dir), repeat(verbose), chunksize=chunksize))
 
 
 class Document:
@@ -11,47 +207,127 @@ class Document:
     def __init__(self, pdf_path: str):
         self.pdf_path = pdf_path
         self._doc: Optional[fitz.Document] = None
+        self._view: Optional[memoryview] = None
+        self._saved_images: Dict[Tuple[str, int], Tuple[str, int, int, str]] = {}
 
-    def analyze_document(self, images_dir: str = "images", *, resolved: bool = False, verbose: bool = False, weights_dir: str = "weights") -> List[Dict[str, Any]]:
-        """Анализ всего документа с выбором режима через флаг resolved."""
-        if self._doc is None:
-            self._doc = fitz.open(self.pdf_path)
-
-        if resolved:
-            os.makedirs(images_dir, exist_ok=True)
-        
-        results: List[Dict[str, Any]] = []
-        vis_images: List[Image.Image] = [] if resolved and verbose else []
-        
-        for page in self._doc:
-            try:
-                res = Page(self.pdf_path, page).analyze_page(self._doc, images_dir=images_dir, resolved=resolved, vis_images=vis_images if resolved and verbose else None, weights_dir=weights_dir)
-                results.append(res)
-            except Exception:
-                continue
+    def analyze_document(self, images_dir: str = "images", *, resolved: bool = False, verbose: bool = False, weights_dir: str = "weights", workers: int = DEFAULT_WORKERS, cache: Optional[PageCache] = None, include_errors: bool = True) -> List[Dict[str, Any]]:
+        """Анализ всего документа с выбором режима через флаг resolved.
+        При workers > 1 страницы анализируются параллельно в отдельных процессах.
+        """
+        vis_images: List[Image.Image] = []
+        results = list(self.iter_pages(images_dir, resolved=resolved, verbose=verbose, weights_dir=weights_dir, workers=workers, vis_images=vis_images if resolved and verbose else None, cache=cache, include_errors=include_errors))
 
         if resolved and verbose and vis_images:
             pdf_out = os.path.join(images_dir, "resolved_annotated.pdf")
             try:
-                first, rest = vis_images[0], vis_images[1:]
-                first.save(pdf_out, "PDF", resolution=100.0, save_all=True, append_images=rest)
+                save_images_as_pdf(vis_images, pdf_out)
                 for r in results: r["annotated_pdf_path"] = pdf_out
             except Exception:
                 pass
         
         return results
 
-    def analyze_and_save_json(self, output_path: str, images_dir: str = "images", *, resolved: bool = False, verbose: bool = False, weights_dir: str = "weights"):
-        """Анализ документа и сохранение в JSON с выбором режима через флаг resolved."""
-        results = self.analyze_document(images_dir=images_dir, resolved=resolved, verbose=verbose, weights_dir=weights_dir)
-        
-        if not resolved:
-            for page_result in results:
-                if "images" in page_result:
-                    del page_result["images"]
+    def iter_pages(self, images_dir: str = "images", *, resolved: bool = False, verbose: bool = False, weights_dir: str = "weights", workers: int = DEFAULT_WORKERS, vis_images: Optional[List[Image.Image]] = None, cache: Optional[PageCache] = None, include_errors: bool = True) -> Iterator[Dict[str, Any]]:
+        """Лениво анализировать страницы документа по порядку.
+        Страницы, анализ которых завершился ошибкой, выдаются на своём месте как
+        {"__error__", "traceback", "page_number"} (трассировка — только при verbose);
+        при include_errors=False такие страницы пропускаются.
+        Если передан vis_images, в него добавляются размеченные изображения страниц.
+        Если передан cache, страницы, уже проанализированные с теми же параметрами, берутся из него;
+        при сборе vis_images кэш не используется, так как изображения нужно построить заново.
+        """
+        if self._doc is None:
+            self._doc, self._view = _open_pdf(self.pdf_path)
+
+        if resolved:
+            os.makedirs(images_dir, exist_ok=True)
+
+        if vis_images is not None:
+            cache = None
+        cache_kwargs = dict(resolved=resolved, weights_dir=weights_dir, images_dir=images_dir)
+        pdf_hash = PageCache.file_hash(self.pdf_path) if cache is not None else None
+        cached = cache.get_pages(pdf_hash, **cache_kwargs) if cache is not None else {}
+
+        num_pages = len(self._doc)
+        indices = [i for i in range(num_pages) if i not in cached]
+        workers = min(workers, len(indices))
+        if workers > 1:
+            computed = self._iter_pages_parallel(indices, images_dir, resolved, weights_dir, vis_images, workers, verbose)
+        else:
+            computed = self._iter_pages_sequential(indices, images_dir, resolved, weights_dir, vis_images, verbose)
+
+        next_page = 0
+        for i, res in computed:
+            for j in range(next_page, i):
+                if j in cached:
+                    yield cached[j]
+            next_page = i + 1
+            if _is_error(res):
+                if include_errors:
+                    yield res
+                continue
+            if cache is not None:
+                cache.put_page(pdf_hash, i, res, **cache_kwargs)
+            yield res
+        for j in range(next_page, num_pages):
+            if j in cached:
+                yield cached[j]
+
+    def _iter_pages_sequential(self, page_indices: Sequence[int], images_dir: str, resolved: bool, weights_dir: str, vis_images: Optional[List[Image.Image]], verbose: bool = False) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Последовательный анализ страниц в текущем процессе; выдаёт пары (номер страницы, результат).
+        В resolved режиме страницы рендерятся пачками в общий переиспользуемый буфер,
+        и детекция макета выполняется сразу для всей пачки.
+        """
+        arena: Optional[np.ndarray] = None
+        analyzer = _get_layout_analyzer(weights_dir) if resolved else None
+        for start in range(0, len(page_indices), RENDER_BATCH_SIZE):
+            indices = page_indices[start:start + RENDER_BATCH_SIZE]
+            page_images = [None] * len(indices)
+            page_layouts = [None] * len(indices)
+            if resolved:
+                page_images, arena = _render_pages(self._doc, indices, arena)
+                try:
+                    page_layouts = analyzer._detect_on_images(page_images, batch_size=RENDER_BATCH_SIZE)
+                except Exception as exc:
+                    logging.debug("Batch layout detection failed, falling back to per-page: %s", exc)
+            for i, page_image, page_layout in zip(indices, page_images, page_layouts):
+                try:
+                    res = Page(self.pdf_path, i, doc=self._doc, saved_images=self._saved_images).analyze_page(self._doc, images_dir=images_dir, resolved=resolved, vis_images=vis_images, weights_dir=weights_dir, page_image=page_image, page_layout=page_layout)
+                except Exception as exc:
+                    res = _page_error(i, exc, verbose)
+                yield i, res
+
+    def _iter_pages_parallel(self, page_indices: Sequence[int], images_dir: str, resolved: bool, weights_dir: str, vis_images: Optional[List[Image.Image]], workers: int, verbose: bool = False) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Параллельный анализ страниц в пуле процессов; пары (номер страницы, результат) выдаются по порядку."""
+        with _create_executor(workers, resolved, weights_dir, self.pdf_path) as executor:
+            outputs = executor.map(
+                _worker_analyze_page, repeat(self.pdf_path), page_indices, repeat(images_dir),
+                repeat(resolved), repeat(weights_dir), repeat(vis_images is not None), repeat(verbose)
+            )
+            for i, res, vis_img in outputs:
+                if vis_images is not None and vis_img is not None:
+                    vis_images.append(vis_img)
+                yield i, res
+
+    def analyze_and_save_json(self, output_path: str, results: Optional[Iterable[Dict[str, Any]]] = None, images_dir: str = "images", *, resolved: bool = False, verbose: bool = False, weights_dir: str = "weights", workers: int = DEFAULT_WORKERS, cache: Optional[PageCache] = None):
+        """Сохранить результаты анализа в JSON.
+        Если results не переданы, страницы анализируются и записываются в файл по одной.
+        """
+        if results is None:
+            if resolved and verbose:
+                results = self.analyze_document(images_dir=images_dir, resolved=resolved, verbose=verbose, weights_dir=weights_dir, workers=workers, cache=cache)
+            else:
+                results = self.iter_pages(images_dir, resolved=resolved, weights_dir=weights_dir, workers=workers, cache=cache)
         
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(results, f, ensure_ascii=False, indent=4)
+        with open(output_path, "wb") as f:
+            f.write(b"[")
+            for i, page_result in enumerate(results):
+                if not resolved:
+                    page_result = {k: v for k, v in page_result.items() if k != "images"}
+                if i:
+                    f.write(b",")
+                f.write(dumps_json(page_result))
+            f.write(b"]")
 
     def __enter__(self):
         """Вход в контекстный менеджер."""
@@ -64,5 +340,7 @@ class Document:
     def close(self):
         """Закрыть документ."""
         if self._doc:
-            self._doc.close()
+            _close_pdf(self._doc, self._view)
             self._doc = None
+            self._view = None
+            self._saved_images.clear()
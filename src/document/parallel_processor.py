@@ -1,18 +1,125 @@
 import os
+import atexit
 import logging
+import functools
 import traceback
-from typing import Any, Dict, List, Optional, Tuple
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional, Tuple, Union
 from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from PIL import Image
-from document.document import Document
+from document.document import Document, _create_executor, _worker_document, _WORKER_SAVED_IMAGES
 from page.page import Page
+from utils.utils import dumps_json, loads_json, save_images_as_pdf
 import fitz
 
+
+# На POSIX сегмент живёт до unlink и переживает закрытие дескриптора воркером.
+# В Windows сегмент удаляется при закрытии последнего дескриптора, т.е. до того, как его прочтёт
+# родитель, поэтому там результаты передаются обычным пиклингом пула.
+_USE_SHARED_MEMORY = os.name == "posix"
+
+
+def _put_shared(payload: bytes) -> Tuple[str, int]:
+    """Записать байты в новый сегмент разделяемой памяти; вернуть его имя и размер данных.
+    Сегмент освобождает читающая сторона в _take_shared; если читатель до него не дошёл,
+    сегмент удалит трекер ресурсов, общий для родителя и воркеров (см. _get_pool).
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(payload)))
+    try:
+        shm.buf[:len(payload)] = payload
+        return shm.name, len(payload)
+    finally:
+        shm.close()
+
+
+def _take_shared(name: str, nbytes: int) -> bytes:
+    """Прочитать байты из сегмента разделяемой памяти и удалить сегмент."""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(shm.buf[:nbytes])
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _put_payload(payload: bytes) -> Tuple[Optional[str], Union[int, bytes]]:
+    """Подготовить байты к передаче из воркера: (имя сегмента, размер) при записи в разделяемую память
+    или (None, сами байты) без разделяемой памяти либо если сегмент создать не удалось, — тогда байты пиклит пул.
+    """
+    if not _USE_SHARED_MEMORY:
+        return None, payload
+    try:
+        return _put_shared(payload)
+    except Exception as exc:
+        logging.warning("Shared memory unavailable, passing %d bytes through the pool: %s", len(payload), exc)
+        return None, payload
+
+
+def _take_payload(name: Optional[str], data: Union[int, bytes]) -> bytes:
+    """Получить байты, переданные через _put_payload; сегмент разделяемой памяти удаляется."""
+    return data if name is None else _take_shared(name, data)
+
+
+def _put_shared_image(img: Image.Image) -> Tuple[Optional[str], Union[int, bytes], int, int]:
+    """Передать изображение сырыми RGB-байтами через _put_payload; вернуть (имя сегмента, данные, ширина, высота)."""
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return (*_put_payload(img.tobytes()), img.width, img.height)
+
+
+def _take_shared_image(name: Optional[str], data: Union[int, bytes], width: int, height: int) -> Image.Image:
+    """Восстановить RGB-изображение, переданное через _put_shared_image."""
+    return Image.frombuffer("RGB", (width, height), _take_payload(name, data), "raw", "RGB", 0, 1)
+
+
+def _error_result(exc: Exception, capture_tracebacks: bool = False, **extra: Any) -> Dict[str, Any]:
+    """Результат-маркер ошибки; трассировка форматируется только при capture_tracebacks."""
+    return {"__error__": f"{type(exc).__name__}: {exc}", "traceback": traceback.format_exc() if capture_tracebacks else None, **extra}
+
+
 class ParallelProcessor:
-    """Класс для параллельной обработки PDF документов."""
+    """Класс для параллельной обработки PDF документов.
+    Пул процессов создаётся лениво и переиспользуется между вызовами, чтобы воркеры
+    не загружали модель (и не создавали CUDA-контекст) заново; закрывается в close().
+    """
     
     def __init__(self, processes: Optional[int] = None):
         self.processes = processes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_key: Optional[Tuple[int, bool, str]] = None
+
+    def _get_pool(self, workers: int, resolved: bool, weights_dir: str) -> ProcessPoolExecutor:
+        """Вернуть общий пул процессов, пересоздав его, если он мал или создан с другими параметрами."""
+        if self._pool is not None:
+            pool_workers, pool_resolved, pool_weights = self._pool_key
+            if pool_workers < workers or pool_resolved != resolved or pool_weights != weights_dir:
+                self.close()
+        if self._pool is None:
+            if _USE_SHARED_MEMORY:
+                # Запустить трекер ресурсов до создания пула, чтобы воркеры регистрировали
+                # сегменты разделяемой памяти в общем трекере, а не в собственных.
+                resource_tracker.ensure_running()
+            self._pool = _create_executor(workers, resolved, weights_dir)
+            self._pool_key = (workers, resolved, weights_dir)
+            atexit.register(self._pool.shutdown)
+        return self._pool
+
+    def __enter__(self):
+        """Вход в контекстный менеджер."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Выход из контекстного менеджера."""
+        self.close()
+
+    def close(self):
+        """Остановить пул процессов."""
+        if self._pool is not None:
+            atexit.unregister(self._pool.shutdown)
+            self._pool.shutdown()
+            self._pool = None
+            self._pool_key = None
 
     def _get_worker_count(self, task_count: int) -> int:
         """Определить оптимальное количество воркеров."""
@@ -20,115 +127,142 @@ class ParallelProcessor:
         if self.processes is None: return min(task_count, max_procs)
         else: return max(1, min(self.processes, max_procs, task_count))
 
-    def _worker_analyze_document(self, pdf_path: str, resolved: bool, images_dir: str = "images") -> Tuple[str, Any]:
+    @staticmethod
+    def _worker_analyze_document(pdf_path: str, resolved: bool, images_dir: str = "images", weights_dir: str = "weights", capture_tracebacks: bool = False) -> Tuple[str, Any]:
         """Воркер для анализа одного документа."""
         try:
             with Document(pdf_path) as doc:
-                if resolved:
-                    result = doc.analyze_document(images_dir=images_dir, resolved=True)
-                else:
-                    result = doc.analyze_document(images_dir=images_dir, resolved=False)
+                result = doc.analyze_document(images_dir=images_dir, resolved=resolved, weights_dir=weights_dir, workers=1)
             return pdf_path, result
         except Exception as exc:
-            return pdf_path, {"__error__": f"{type(exc).__name__}: {exc}", "traceback": traceback.format_exc()}
+            return pdf_path, _error_result(exc, capture_tracebacks)
 
     def analyze_documents_parallel(self, pdf_paths: List[str], images_dir: str = "images", 
-                                 *, resolved: bool = False) -> Dict[str, Any]:
-        """Параллельный анализ нескольких документов."""
+                                 *, resolved: bool = False, weights_dir: str = "weights", capture_tracebacks: bool = False) -> Dict[str, Any]:
+        """Параллельный анализ нескольких документов.
+        Трассировка ошибок сохраняется в поле "traceback" только при capture_tracebacks, иначе там None.
+        """
         if not pdf_paths:
             return {}
 
         workers = self._get_worker_count(len(pdf_paths))
         results: Dict[str, Any] = {}
         
-        with ProcessPoolExecutor(max_workers=workers) as executor:
-            futures = {
-                executor.submit(self._worker_analyze_document, path, resolved, images_dir): path 
-                for path in pdf_paths
-            }
-            
-            for future in as_completed(futures):
-                path = futures[future]
-                try:
-                    _path, res = future.result()
-                    results[_path] = res
-                except Exception as exc:
-                    results[path] = {"__error__": f"{type(exc).__name__}: {exc}", "traceback": traceback.format_exc()}
+        executor = self._get_pool(workers, resolved, weights_dir)
+        futures = {
+            executor.submit(self._worker_analyze_document, path, resolved, images_dir, weights_dir, capture_tracebacks): path 
+            for path in pdf_paths
+        }
+        
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                _path, res = future.result()
+                results[_path] = res
+            except Exception as exc:
+                if isinstance(exc, BrokenProcessPool):
+                    self.close()
+                results[path] = _error_result(exc, capture_tracebacks)
 
         return results
 
-    def _worker_analyze_page(self, pdf_path: str, page_index: int, images_dir: str, resolved: bool) -> Tuple[int, Any]:
-        """Воркер для анализа одной страницы."""
+    @staticmethod
+    def _worker_analyze_page(pdf_path: str, page_index: int, images_dir: str, resolved: bool, weights_dir: str = "weights", capture_tracebacks: bool = False) -> Tuple[int, Optional[str], Union[int, bytes], Optional[tuple]]:
+        """Воркер для анализа одной страницы; документ открывается один раз на процесс-воркер.
+        Результат не пиклится, а передаётся как JSON в разделяемой памяти; размеченное
+        изображение страницы приводится к RGB и передаётся сырыми байтами в отдельном сегменте.
+        Воркер не выбрасывает исключений, чтобы ошибка одной страницы не прерывала executor.map.
+        Возвращает (номер страницы, *_put_payload(JSON), _put_shared_image(изображение) или None).
+        """
+        vis_shared = None
         try:
-            doc = fitz.open(pdf_path)
-            try:
-                page = doc[page_index]
-                page_obj = Page(pdf_path, page)
-                
-                if resolved:
-                    vis_images = []
-                    result = page_obj.analyze_page(doc, images_dir=images_dir, resolved=True, vis_images=vis_images)
-                    vis_img = vis_images[0] if vis_images else None
-                    return page_index, result, vis_img
-                else:
-                    result = page_obj.analyze_page(doc, images_dir=images_dir, resolved=False)
-                    return page_index, result
-            finally:
-                doc.close()
+            doc = _worker_document(pdf_path)
+            vis_images = [] if resolved else None
+            result = Page(pdf_path, page_index, doc=doc, saved_images=_WORKER_SAVED_IMAGES).analyze_page(doc, images_dir=images_dir, resolved=resolved, vis_images=vis_images, weights_dir=weights_dir)
         except Exception as exc:
             logging.error("Page analysis failed for %s [page %d]: %s", pdf_path, page_index, exc)
-            error_result = {"__error__": f"{type(exc).__name__}: {exc}", "traceback": traceback.format_exc(), "page_number": page_index}
-            if resolved:
-                return page_index, error_result, None
-            else:
-                return page_index, error_result
+            result = _error_result(exc, capture_tracebacks, page_number=page_index)
+            vis_images = None
+        try:
+            payload = dumps_json(result)
+        except Exception as exc:
+            logging.error("Page result is not serializable for %s [page %d]: %s", pdf_path, page_index, exc)
+            payload = dumps_json(_error_result(exc, capture_tracebacks, page_number=page_index))
+        if vis_images:
+            try:
+                vis_shared = _put_shared_image(vis_images[0])
+            except Exception as exc:
+                logging.error("Failed to pass annotated image for %s [page %d]: %s", pdf_path, page_index, exc)
+        return (page_index, *_put_payload(payload), vis_shared)
+
+    @staticmethod
+    def _read_page_output(output: Tuple[int, Optional[str], Union[int, bytes], Optional[tuple]], by_index: Dict[int, Any], vis_by_index: Dict[int, Image.Image], capture_tracebacks: bool) -> None:
+        """Прочитать результат _worker_analyze_page в родительском процессе; сегменты страницы удаляются."""
+        idx, name, data, vis_shared = output
+        if vis_shared is not None:
+            try:
+                vis_by_index[idx] = _take_shared_image(*vis_shared)
+            except Exception as exc:
+                logging.error("Failed to read annotated image for page %d: %s", idx, exc)
+        try:
+            by_index[idx] = loads_json(_take_payload(name, data))
+        except Exception as exc:
+            logging.error("Failed to read result for page %d: %s", idx, exc)
+            by_index[idx] = _error_result(exc, capture_tracebacks, page_number=idx)
 
     def analyze_document_parallel_pages(self, pdf_path: str, images_dir: str = "images", 
-                                      *, resolved: bool = False, include_errors: bool = False) -> List[Any]:
-        """Параллельный анализ страниц одного документа."""
+                                      *, resolved: bool = False, include_errors: bool = False, weights_dir: str = "weights",
+                                      num_pages: Optional[int] = None, capture_tracebacks: bool = False) -> List[Any]:
+        """Параллельный анализ страниц одного документа.
+        Если число страниц num_pages известно заранее, PDF не открывается в родительском процессе.
+        Трассировка ошибок сохраняется в поле "traceback" только при capture_tracebacks, иначе там None.
+        """
         if not pdf_path:
             return []
 
-        try:
-            doc = fitz.open(pdf_path)
-            num_pages = len(doc)
-            doc.close()
-        except Exception:
-            logging.error("Failed to open PDF: %s", pdf_path)
-            return []
+        if num_pages is None:
+            try:
+                with fitz.open(pdf_path) as doc:
+                    num_pages = doc.page_count
+            except Exception:
+                logging.error("Failed to open PDF: %s", pdf_path)
+                return []
 
         workers = self._get_worker_count(num_pages)
         by_index: Dict[int, Any] = {}
-        vis_images: List[Image.Image] = []
+        vis_by_index: Dict[int, Image.Image] = {}
         
-        with ProcessPoolExecutor(max_workers=workers) as executor:
+        executor = self._get_pool(workers, resolved, weights_dir)
+        if not resolved:
+            worker = functools.partial(self._worker_analyze_page, pdf_path, images_dir=images_dir, resolved=False, weights_dir=weights_dir, capture_tracebacks=capture_tracebacks)
+            chunksize = max(1, num_pages // (workers * 4))
+            try:
+                for output in executor.map(worker, range(num_pages), chunksize=chunksize):
+                    self._read_page_output(output, by_index, vis_by_index, capture_tracebacks)
+            except Exception as exc:
+                # Воркер ловит ошибки страниц сам, поэтому сюда попадают только сбои пула.
+                if isinstance(exc, BrokenProcessPool):
+                    self.close()
+                logging.error("Parallel page analysis failed for %s: %s", pdf_path, exc)
+                for i in range(num_pages):
+                    by_index.setdefault(i, _error_result(exc, capture_tracebacks, page_number=i))
+        else:
             futures = {
-                executor.submit(self._worker_analyze_page, pdf_path, i, images_dir, resolved): i 
+                executor.submit(self._worker_analyze_page, pdf_path, i, images_dir, resolved, weights_dir, capture_tracebacks): i 
                 for i in range(num_pages)
             }
             
             for future in as_completed(futures):
                 i = futures[future]
                 try:
-                    if resolved:
-                        result_tuple = future.result()
-                        if len(result_tuple) == 3:
-                            idx, res, vis_img = result_tuple
-                            if vis_img is not None:
-                                try:
-                                    img = vis_img if vis_img.mode == "RGB" else vis_img.convert("RGB")
-                                    vis_images.append(img)
-                                except Exception:
-                                    pass
-                        else:
-                            idx, res = result_tuple[0], result_tuple[1]
-                    else:
-                        idx, res = future.result()
-                    
-                    by_index[idx] = res
+                    output = future.result()
                 except Exception as exc:
+                    if isinstance(exc, BrokenProcessPool):
+                        self.close()
                     logging.error("Future failed for page %d: %s", i, exc)
-                    by_index[i] = {"__error__": f"{type(exc).__name__}: {exc}", "traceback": traceback.format_exc(), "page_number": i}
+                    by_index[i] = _error_result(exc, capture_tracebacks, page_number=i)
+                    continue
+                self._read_page_output(output, by_index, vis_by_index, capture_tracebacks)
 
         out: List[Any] = []
         for i in range(num_pages):
@@ -139,12 +273,12 @@ class ParallelProcessor:
                 continue
             out.append(res)
         
+        vis_images = [vis_by_index[i] for i in sorted(vis_by_index)]
         if resolved and vis_images:
             os.makedirs(images_dir, exist_ok=True)
             pdf_out = os.path.join(images_dir, "resolved_annotated.pdf")
             try:
-                first, rest = vis_images[0], vis_images[1:]
-                first.save(pdf_out, "PDF", resolution=100.0, save_all=True, append_images=rest)
+                save_images_as_pdf(vis_images, pdf_out)
                 for r in out:
                     if isinstance(r, dict):
                         r["annotated_pdf_path"] = pdf_out
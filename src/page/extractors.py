@@ -1,27 +1,131 @@
 import io
 import os
+import bisect
 import fitz
 import re
 import string
 import unicodedata
+from dataclasses import dataclass, field
 from typing import Tuple, Dict, Any, List, Optional, Iterable, Set
 from PIL import Image
 from config.model_config import _URL_RE, TOC_WORDS_RE, Appendix_WORDS_RE
+from utils.utils import ensure_dir
 
 BBox = Tuple[float, float, float, float]
 
+_RX_DOTS = re.compile(r"[.]{2,}")
+_RX_DOT_BETWEEN_DIGITS = re.compile(r'(?<=\d)\s*\.\s*(?=\d)')
+_RX_DOT_AFTER_DIGIT = re.compile(r'(?<=\d)\s*\.(?=\s)')
+_RX_WS = re.compile(r"\s+")
+_RX_INT = re.compile(r"\d+")
+_RX_NUM_ONLY = re.compile(r"^\d+(?:\.\d+)*$")
+_NEED_SPACE_SKIP = frozenset(string.punctuation + string.whitespace)
+_RX_CONTROL: Optional["re.Pattern[str]"] = None
+
+
+def _control_chars_re() -> "re.Pattern[str]":
+    """Класс всех символов Unicode категории C одной регуляркой.
+    Строится из диапазонов кодовых точек при первом вызове, чтобы не замедлять импорт.
+    """
+    global _RX_CONTROL
+    if _RX_CONTROL is None:
+        ranges: List[str] = []
+        start = None
+        for cp in range(0x110001):
+            is_control = cp <= 0x10FFFF and unicodedata.category(chr(cp))[0] == "C"
+            if is_control and start is None:
+                start = cp
+            elif not is_control and start is not None:
+                ranges.append(f"\\U{start:08x}-\\U{cp - 1:08x}")
+                start = None
+        _RX_CONTROL = re.compile("[" + "".join(ranges) + "]")
+    return _RX_CONTROL
+
 
 def _normalize_toc_line(text: str) -> str:
-    text = re.sub(r"[.]{2,}", " ", text)  
-    text = re.sub(r'(?<=\d)\s*\.\s*(?=\d)', '.', text) 
-    text = re.sub(r'(?<=\d)\s*\.(?=\s)', '.', text)        
-    return re.sub(r"\s+", " ", text).strip()
+    text = _RX_DOTS.sub(" ", text)
+    text = _RX_DOT_BETWEEN_DIGITS.sub('.', text)
+    text = _RX_DOT_AFTER_DIGIT.sub('.', text)
+    return _RX_WS.sub(" ", text).strip()
+
+@dataclass
+class PageContentCache:
+    """Общий для экстракторов одной страницы кэш результатов PyMuPDF:
+    словарь текста (по флагам), его отфильтрованный вариант, текст, блоки, ссылки и изображения.
+    """
+    page: "fitz.Page"
+    _text_dicts: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    _minimal_text_dicts: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    _texts: Dict[int, str] = field(default_factory=dict)
+    _raw_blocks: Dict[int, List[tuple]] = field(default_factory=dict)
+    _links: Optional[List[Dict[str, Any]]] = None
+    _images: Optional[List[tuple]] = None
+
+    def text_dict(self, flags: int = fitz.TEXTFLAGS_SEARCH) -> Dict[str, Any]:
+        """page.get_text("dict", flags=flags)."""
+        if flags not in self._text_dicts:
+            self._text_dicts[flags] = self.page.get_text("dict", flags=flags)
+        return self._text_dicts[flags]
+
+    def minimal_text_dict(self, flags: int = fitz.TEXTFLAGS_SEARCH) -> Dict[str, Any]:
+        """Отфильтрованный словарь текста (см. TextExtractor._get_minimal_text_dict)."""
+        if flags not in self._minimal_text_dicts:
+            self._minimal_text_dicts[flags] = TextExtractor._get_minimal_text_dict(self.text_dict(flags))
+        return self._minimal_text_dicts[flags]
+
+    def text(self, flags: int = fitz.TEXTFLAGS_SEARCH) -> str:
+        """Текст страницы, собранный из text_dict(flags): спаны строки подряд, строки через перевод строки.
+        Отдельный проход page.get_text("text") не нужен.
+        """
+        if flags not in self._texts:
+            self._texts[flags] = "\n".join(
+                "".join(span.get("text", "") for span in line.get("spans", []))
+                for block in self.text_dict(flags).get("blocks", [])
+                for line in block.get("lines", [])
+            )
+        return self._texts[flags]
+
+    def raw_blocks(self, flags: int = fitz.TEXTFLAGS_SEARCH) -> List[tuple]:
+        """Текстовые блоки в формате page.get_text("blocks"): (x0, y0, x1, y1, текст, номер блока, 0).
+        Собираются из text_dict(flags), без отдельного прохода по странице; каждая строка текста завершается переводом строки.
+        """
+        if flags not in self._raw_blocks:
+            self._raw_blocks[flags] = [
+                (*block["bbox"],
+                 "".join("".join(span.get("text", "") for span in line.get("spans", [])) + "\n" for line in block.get("lines", [])),
+                 block.get("number", n), 0)
+                for n, block in enumerate(self.text_dict(flags).get("blocks", []))
+                if block.get("type", 0) == 0
+            ]
+        return self._raw_blocks[flags]
+
+    def links(self) -> List[Dict[str, Any]]:
+        """page.get_links()."""
+        if self._links is None:
+            self._links = self.page.get_links()
+        return self._links
+
+    def images(self) -> List[tuple]:
+        """page.get_images(full=True)."""
+        if self._images is None:
+            self._images = self.page.get_images(full=True)
+        return self._images
+
+    def clear(self) -> None:
+        """Сбросить все закэшированные результаты."""
+        self._text_dicts.clear()
+        self._minimal_text_dicts.clear()
+        self._texts.clear()
+        self._raw_blocks.clear()
+        self._links = self._images = None
+
 
 class TextExtractor:
     """Извлечение и структурирование текста."""
     
-    def __init__(self, page: "fitz.Page"):
+    def __init__(self, page: "fitz.Page", cache: Optional[PageContentCache] = None):
         self.page = page
+        self.cache = cache if cache is not None else PageContentCache(page)
         self._text_dict: Optional[Dict[str, Any]] = None
         self._clear_text_blocks: Optional[List[Dict[str, Any]]] = None
         self._structured_blocks: Optional[List[Dict[str, Any]]] = None
@@ -34,12 +138,13 @@ class TextExtractor:
             flags: Флаги для извлечения текста
             minimal: Если True, возвращает только основные метаданные
         """
-        self._text_dict = self.page.get_text("dict", flags=flags)
-        if minimal: return self._get_minimal_text_dict(self._text_dict)
+        self._text_dict = self.cache.text_dict(flags)
+        if minimal: return self.cache.minimal_text_dict(flags)
         return self._text_dict
 
 
-    def _get_minimal_text_dict(self, raw_dict: Dict) -> Dict:
+    @staticmethod
+    def _get_minimal_text_dict(raw_dict: Dict) -> Dict:
         """Отфильтровать лишние метаданные."""
         minimal_blocks = []
 
@@ -73,7 +178,7 @@ class TextExtractor:
 
                 first_text = minimal_line['spans'][0]['text'].strip()
                 last_text = minimal_line['spans'][-1]['text'].strip()
-                if re.fullmatch(r"\d+", first_text) or re.fullmatch(r"\d+", last_text):
+                if _RX_INT.fullmatch(first_text) or _RX_INT.fullmatch(last_text):
                     continue
 
                 minimal_block['lines'].append(minimal_line)
@@ -88,11 +193,14 @@ class TextExtractor:
     def get_clear_text_blocks(self, table_bboxes: List[fitz.Rect]) -> List[Dict[str, Any]]:
         """Получить текстовые блоки, не пересекающиеся с таблицами."""
         if self._clear_text_blocks is None:
-            text_dict = self.get_text_dict()
-            self._clear_text_blocks = [
-                b for b in text_dict.get("blocks", [])
-                if "lines" in b and not any(fitz.Rect(b["bbox"]).intersects(tb) for tb in table_bboxes)
-            ]
+            text_blocks = [b for b in self.get_text_dict().get("blocks", []) if "lines" in b]
+            if table_bboxes:
+                block_rects = [fitz.Rect(b["bbox"]) for b in text_blocks]
+                text_blocks = [
+                    b for b, rect in zip(text_blocks, block_rects)
+                    if not any(rect.intersects(tb) for tb in table_bboxes)
+                ]
+            self._clear_text_blocks = text_blocks
         return self._clear_text_blocks
 
     @staticmethod
@@ -116,7 +224,8 @@ class TextExtractor:
         block_bbox = list(b.get("bbox", []))   
         parts: list[str] = []
         spans_out: list[Dict[str, Any]] = []
-        total_len = 0   
+        total_len = 0
+        prev_last = ""
 
         for l in b.get("lines", []):
             line_bbox = list(l.get("bbox", []))
@@ -126,19 +235,16 @@ class TextExtractor:
                 if not raw:
                     continue
 
-                need_space = False
-                if parts:
-                    prev_text = parts[-1]
-                    need_space = self.need_space_between(prev_text, raw)   
-
-                if need_space:
+                # raw уже без пробелов по краям, поэтому need_space_between сводится к проверке граничных символов
+                if prev_last and prev_last not in _NEED_SPACE_SKIP and raw[0] not in _NEED_SPACE_SKIP:
                     parts.append(" ")
-                    total_len += 1   
+                    total_len += 1
 
                 start_char = total_len
                 parts.append(raw)
                 total_len += len(raw)
                 end_char = total_len
+                prev_last = raw[-1]
 
                 spans_out.append({
                     "id": f"block_{idx}_span_{len(spans_out)}",
@@ -177,8 +283,9 @@ class TextExtractor:
 class TableExtractor:
     """Извлечение таблиц."""
     
-    def __init__(self, page: "fitz.Page"):
+    def __init__(self, page: "fitz.Page", cache: Optional[PageContentCache] = None):
         self.page = page
+        self.cache = cache if cache is not None else PageContentCache(page)
         self._tables_data: Optional[List[List[List[str]]]] = None
         self._tables_bboxes: Optional[List[fitz.Rect]] = None
 
@@ -195,34 +302,62 @@ class TableExtractor:
 
 class LinkExtractor:
     """Извлечение ссылок."""
-    def __init__(self, page: "fitz.Page"):
+    def __init__(self, page: "fitz.Page", cache: Optional[PageContentCache] = None):
         self.page = page
+        self.cache = cache if cache is not None else PageContentCache(page)
         self._links: Optional[List[Dict[str, Any]]] = None
+        self._line_index: Optional[Tuple[Dict[str, Any], List[float], List[Tuple[BBox, int, Dict[str, Any]]]]] = None
 
     @staticmethod
     def _clean_text(txt: str) -> str:
         """Очистить текст от управляющих символов."""
-        return "".join(ch for ch in txt if unicodedata.category(ch)[0] != "C").strip()
+        # isprintable() ложно для любого символа категории C, так что печатный текст не требует фильтрации.
+        if txt.isprintable():
+            return txt.strip()
+        return _control_chars_re().sub("", txt).strip()
+
+    def _get_line_index(self, text_dict: Dict[str, Any]) -> Tuple[List[float], List[Tuple[BBox, int, Dict[str, Any]]]]:
+        """Индекс строк страницы, отсортированный по верхней границе y0.
+        Элемент — (bbox, порядковый номер строки в документе, строка); вырожденные строки не входят.
+        """
+        if self._line_index is None or self._line_index[0] is not text_dict:
+            entries = []
+            order = 0
+            for block in text_dict.get("blocks", []):
+                for line in block.get("lines", ()):
+                    x0, y0, x1, y1 = line["bbox"]
+                    if x0 < x1 and y0 < y1:
+                        entries.append(((x0, y0, x1, y1), order, line))
+                    order += 1
+            entries.sort(key=lambda e: e[0][1])
+            self._line_index = (text_dict, [e[0][1] for e in entries], entries)
+        return self._line_index[1], self._line_index[2]
 
     def _find_full_line_text_intersecting(self, text_dict: Dict[str, Any], bbox_link: BBox) -> Optional[str]:
-        """Найти полный текст строки, пересекающейся с bbox ссылки."""
-        rect_link = fitz.Rect(bbox_link)
-        for block in text_dict.get("blocks", []):
-            if "lines" not in block:
-                continue
-            for line in block["lines"]:
-                line_bbox = fitz.Rect(line["bbox"])
-                if line_bbox.intersects(rect_link):
-                    return " ".join(
-                        self._clean_text(span.get("text", "")).strip()
-                        for span in line.get("spans", [])
-                        if span.get("text")
-                    )
-        return None
+        """Найти полный текст строки, пересекающейся с bbox ссылки.
+        Если таких строк несколько, берётся первая в порядке документа.
+        """
+        lx0, ly0, lx1, ly1 = bbox_link
+        if not (lx0 < lx1 and ly0 < ly1):
+            return None
+        tops, entries = self._get_line_index(text_dict)
+        found = None
+        for (x0, y0, x1, y1), order, line in entries[:bisect.bisect_left(tops, ly1)]:
+            if y1 > ly0 and x0 < lx1 and lx0 < x1 and (found is None or order < found[0]):
+                found = (order, line)
+        if found is None:
+            return None
+        return " ".join(
+            self._clean_text(span.get("text", "")).strip()
+            for span in found[1].get("spans", [])
+            if span.get("text")
+        )
 
     def _iter_link_annotations(self, text_dict: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
-        """Итерировать по аннотациям ссылок на странице."""
-        for lnk in self.page.get_links():
+        """Итерировать по аннотациям ссылок на странице.
+        Генератор: текст строки ищется только для запрошенных ссылок, так что потребитель может остановиться на первой подходящей.
+        """
+        for lnk in self.cache.links():
             uri = lnk.get("uri")
             if not uri:
                 continue
@@ -241,6 +376,9 @@ class LinkExtractor:
                     span_text = span.get("text", "").strip()
                     if not span_text:
                         continue
+                    # _URL_RE совпадает только с текстом, содержащим "http" или "www.", — дешёвая проверка подстрок
+                    if "http" not in span_text and "www." not in span_text:
+                        continue
                     m = _URL_RE.search(span_text)
                     if not m:
                         continue
@@ -263,34 +401,44 @@ class ImageExtractor:
     
     CAPTION_MAX_DY_PT = 100
     
-    def __init__(self, page: "fitz.Page"):
+    def __init__(self, page: "fitz.Page", cache: Optional[PageContentCache] = None):
         self.page = page
+        self.cache = cache if cache is not None else PageContentCache(page)
         self._images: Optional[List[Dict[str, Any]]] = None
         self._captions: Optional[List[Dict[str, Any]]] = None
+        self._page_images_with_bbox: Optional[List[Tuple[tuple, fitz.Rect]]] = None
+
+    def _images_with_bbox(self) -> List[Tuple[tuple, fitz.Rect]]:
+        """Изображения страницы вместе с bbox (включая пустые); get_image_bbox вызывается один раз на изображение."""
+        if self._page_images_with_bbox is None:
+            self._page_images_with_bbox = [(img_info, fitz.Rect(self.page.get_image_bbox(img_info))) for img_info in self.cache.images()]
+        return self._page_images_with_bbox
 
     def _iter_page_images(self) -> Iterable[Tuple[tuple, fitz.Rect]]:
         """Итерировать по изображениям на странице."""
-        for img_info in self.page.get_images(full=True):
-            bbox = fitz.Rect(self.page.get_image_bbox(img_info))
+        for img_info, bbox in self._images_with_bbox():
             if not bbox.is_empty:
                 yield img_info, bbox
 
-    def _get_image_bbox_maybe(self, img_info: tuple) -> Optional[List[float]]:
-        """получить bbox изображения."""
-        return list(fitz.Rect(self.page.get_image_bbox(img_info)))
-
-    def _extract_image_bytes(self, doc: fitz.Document, xref: int) -> Optional[Tuple[bytes, str]]:
-        """Извлечь байты изображения из документа."""
+    def _extract_image_bytes(self, doc: fitz.Document, xref: int) -> Optional[Tuple[bytes, str, Optional[Tuple[int, int]]]]:
+        """Извлечь байты изображения из документа вместе с расширением и размером, если он известен."""
         info = doc.extract_image(xref)
-        return info["image"], info.get("ext", "png")
+        size = (info["width"], info["height"]) if info.get("width") and info.get("height") else None
+        return info["image"], info.get("ext", "png"), size
 
-    def _save_image_bytes(self, img_bytes: bytes, ext: str, out_dir: str, img_id: str) -> Optional[Tuple[str, int, int]]:
-        """Сохранить байты изображения в файл."""
-        im = Image.open(io.BytesIO(img_bytes))
+    def _save_image_bytes(self, img_bytes: bytes, ext: str, out_dir: str, img_id: str,
+                          size: Optional[Tuple[int, int]] = None) -> Optional[Tuple[str, int, int]]:
+        """Сохранить байты изображения в файл как есть, без перекодирования.
+        Если размер не передан, он читается из заголовка изображения.
+        """
+        if size is None:
+            with Image.open(io.BytesIO(img_bytes)) as im:
+                size = im.size
         fname = f"{img_id}.{ext}"
         fpath = os.path.join(out_dir, fname)
-        im.save(fpath)
-        return fpath, im.width, im.height
+        with open(fpath, "wb") as f:
+            f.write(img_bytes)
+        return fpath, size[0], size[1]
 
     def _stable_image_id(self, xref: int, seen: Dict[int, int]) -> str:
         """Создать стабильный ID для изображения."""
@@ -298,28 +446,39 @@ class ImageExtractor:
         suffix = "" if seen[xref] == 1 else f"_{seen[xref]}"
         return f"img_p{self.page.number}_{xref}{suffix}"
 
-    def extract_images(self, out_dir: str = "images") -> List[Dict[str, Any]]:
-        """Извлечь все изображения со страницы."""
+    def extract_images(self, out_dir: str = "images", saved_xrefs: Optional[Dict[Tuple[str, int], Tuple[str, int, int, str]]] = None) -> List[Dict[str, Any]]:
+        """Извлечь все изображения со страницы.
+        saved_xrefs — уже сохранённые изображения документа: (папка, xref) -> (путь, ширина, высота, расширение).
+        Вызывающий код передаёт один словарь для всех страниц документа, чтобы повторяющееся изображение
+        сохранялось один раз; без него повторы отслеживаются только в пределах страницы.
+        """
         if self._images is None:
-            os.makedirs(out_dir, exist_ok=True)
+            ensure_dir(out_dir)
             results: List[Dict[str, Any]] = []
             seen: Dict[int, int] = {}
             doc = self.page.parent
+            if saved_xrefs is None:
+                saved_xrefs = {}
 
-            for img_info in self.page.get_images(full=True):
+            for img_info, bbox in self._images_with_bbox():
                 xref = img_info[0]
                 img_id = self._stable_image_id(xref, seen)
-                bbox_list = self._get_image_bbox_maybe(img_info)
+                bbox_list = list(bbox)
 
-                data = self._extract_image_bytes(doc, xref)
-                if not data:
-                    continue
-                img_bytes, ext = data
+                # Одно и то же изображение (логотип, колонтитул) декодируется и пишется на диск один раз на документ.
+                cached = saved_xrefs.get((out_dir, xref))
+                if cached is None:
+                    data = self._extract_image_bytes(doc, xref)
+                    if not data:
+                        continue
+                    img_bytes, ext, size = data
 
-                saved = self._save_image_bytes(img_bytes, ext, out_dir, img_id)
-                if not saved:
-                    continue
-                fpath, width, height = saved
+                    saved = self._save_image_bytes(img_bytes, ext, out_dir, img_id, size)
+                    if not saved:
+                        continue
+                    cached = (*saved, ext)
+                    saved_xrefs[(out_dir, xref)] = cached
+                fpath, width, height, ext = cached
 
                 results.append({
                     "id": img_id,
@@ -333,28 +492,30 @@ class ImageExtractor:
             self._images = results
         return self._images
 
-    def _page_text_blocks_raw(self) -> List[Tuple[BBox, str]]:
-        """Быстро получить список текстовых блоков страницы как (bbox, text)."""
-        raw = self.page.get_text("blocks")
-        out: List[Tuple[BBox, str]] = []
-        for tb in raw:
-            bbox = tuple(tb[:4])
+    def _page_text_blocks_raw(self) -> Tuple[List[float], List[Tuple[BBox, str, int]]]:
+        """Непустые текстовые блоки страницы, отсортированные по y0.
+        Возвращает (список y0, список (bbox, text, порядковый номер блока на странице)).
+        """
+        out: List[Tuple[BBox, str, int]] = []
+        for order, tb in enumerate(self.cache.raw_blocks()):
             txt = (tb[4] or "").strip()
-            out.append((bbox, txt))
-        return out
-
-    def _is_caption_for_image(self, text_bbox: fitz.Rect, img_bbox: fitz.Rect) -> bool:
-        """Проверить, является ли текстовый блок подписью к изображению."""
-        is_below = text_bbox.y0 > img_bbox.y1
-        close_vertically = (text_bbox.y0 - img_bbox.y1) < self.CAPTION_MAX_DY_PT
-        return is_below and close_vertically
-
-    def _find_first_caption_below(self, img_bbox: fitz.Rect, all_text_blocks: List[Tuple[BBox, str]]) -> Optional[Tuple[BBox, str]]:
-        """Найти первый текстовый блок, который выглядит подписью к изображению."""
-        for bbox, text in all_text_blocks:
-            if text and self._is_caption_for_image(fitz.Rect(bbox), img_bbox):
-                return bbox, text
-        return None
+            if txt:
+                out.append((tuple(tb[:4]), txt, order))
+        out.sort(key=lambda item: item[0][1])
+        return [item[0][1] for item in out], out
+
+    def _find_first_caption_below(self, img_bbox: fitz.Rect, text_blocks: Tuple[List[float], List[Tuple[BBox, str, int]]]) -> Optional[Tuple[BBox, str]]:
+        """Найти первый по порядку на странице текстовый блок, который выглядит подписью к изображению.
+        Подписью считается блок ниже изображения не дальше CAPTION_MAX_DY_PT; такие блоки находятся бинарным поиском по y0.
+        """
+        ys, blocks = text_blocks
+        best: Optional[Tuple[BBox, str, int]] = None
+        for k in range(bisect.bisect_right(ys, img_bbox.y1), len(ys)):
+            if ys[k] - img_bbox.y1 >= self.CAPTION_MAX_DY_PT:
+                break
+            if best is None or blocks[k][2] < best[2]:
+                best = blocks[k]
+        return (best[0], best[1]) if best is not None else None
 
     def extract_captions(self) -> List[Dict[str, Any]]:
         """Найти подписи к изображениям."""
@@ -382,16 +543,17 @@ class ImageExtractor:
 
 class TitleExtractor:
     """Извлечение заголовков из оглавления."""
-    def __init__(self, page: "fitz.Page"):
+    def __init__(self, page: "fitz.Page", cache: Optional[PageContentCache] = None):
         self.page = page
+        self.cache = cache if cache is not None else PageContentCache(page)
         self.titles: List[str] = []
         self.titles_spans = []
 
     def _page_text_dict(self, flags: int = fitz.TEXTFLAGS_SEARCH) -> Dict[str, Any]:
-        return self.page.get_text("dict", flags=flags)
+        return self.cache.text_dict(flags)
 
     def is_toc_page(self) -> bool:
-        txt = self.page.get_text("text") or ""
+        txt = self.cache.text()
         if not txt:
             return False
         found = {m.group(1).lower() for m in TOC_WORDS_RE.finditer(txt)}
@@ -401,40 +563,40 @@ class TitleExtractor:
         """
         получить список огравлений
         """
-        pages = [self.page]
+        caches = [self.cache]
         doc = self.page.parent
         nxt_idx = self.page.number + 1
-        nxt = doc[nxt_idx]
-        if Appendix_WORDS_RE.search(nxt.get_text("text") or ""):
-            pages.append(nxt)
+        if nxt_idx < doc.page_count:
+            # Словарь следующей страницы разбирается один раз: и для поиска приложения, и для строк.
+            nxt_cache = PageContentCache(doc[nxt_idx])
+            if Appendix_WORDS_RE.search(nxt_cache.text()):
+                caches.append(nxt_cache)
+
+        need_space = TextExtractor.need_space_between
 
-        def parse_page_lines(page) -> list[str]:
+        def parse_page_lines(cache: PageContentCache) -> list[str]:
             lines: list[str] = []
-            d = page.get_text("dict", flags=fitz.TEXTFLAGS_SEARCH)
+            d = cache.text_dict(fitz.TEXTFLAGS_SEARCH)
             for block in d.get("blocks", []) or []:
                 for line in block.get("lines", []) or []:
-                    parts: list[str] = []
-                    for s in line.get("spans", []) or []:
-                        seg = (s.get("text") or "").strip()
-                        if not seg:
-                            continue
-                        if parts and self.need_space_between(parts[-1], seg):
-                            parts.append(" ")
-                        parts.append(seg)
-                    raw = "".join(parts)
-                    if not raw or raw.strip().isdigit():
+                    segs = [seg for seg in ((s.get("text") or "").strip() for s in line.get("spans", []) or []) if seg]
+                    if not segs:
+                        continue
+                    raw = segs[0] + "".join(
+                        " " + seg if need_space(prev, seg) else seg for prev, seg in zip(segs, segs[1:])
+                    )
+                    if _RX_INT.fullmatch(raw):
                         continue
                     lines.append(raw)
             return lines
 
         out: list[str] = []
-        for p in pages:
-            out.extend(parse_page_lines(p))
+        for cache in caches:
+            out.extend(parse_page_lines(cache))
 
         merged: list[str] = []
-        rx_num_only = re.compile(r"^\d+(?:\.\d+)*$")
         for s in out:
-            if merged and rx_num_only.fullmatch(merged[-1]):
+            if merged and _RX_NUM_ONLY.fullmatch(merged[-1]):
                 merged[-1] = merged[-1] + " " + s
             else:
                 merged.append(s)
@@ -447,5 +609,4 @@ class TitleExtractor:
                 seen.add(key)
                 result.append(s)
         self.titles = result
-        return 
-
+        return
@@ -1,12 +1,54 @@
 # pylint: disable=no-member
-from typing import List, Tuple, Optional, Iterable, Dict, Any, Protocol
+import os
+import functools
+import contextlib
+from dataclasses import dataclass
+from typing import List, Tuple, Optional, Iterable, Dict, Any, Protocol, Union
 import fitz
+import numpy as np
 import layoutparser as lp   
 from pdf2image import convert_from_path
 from PIL import Image
 from layoutparser.elements import Layout, TextBlock, Rectangle  
-from config.model_config import DEFAULT_DPI
-from config.model_config import get_model_configs
+from config.model_config import DEFAULT_DPI, DEFAULT_LAYOUT_MODEL
+from config.model_config import get_layout_model
+from utils.utils import save_images_as_pdf
+
+
+def _area_xyxy(x1: float, y1: float, x2: float, y2: float) -> float:
+    """Площадь прямоугольника (нулевая для вырожденного)."""
+    return max(0.0, x2 - x1) * max(0.0, y2 - y1)
+
+
+def _intersects_xyxy(ax1: float, ay1: float, ax2: float, ay2: float,
+                     bx1: float, by1: float, bx2: float, by2: float) -> bool:
+    """Пересекаются ли прямоугольники с ненулевой площадью пересечения."""
+    return (min(ax2, bx2) - max(ax1, bx1)) > 0 and (min(ay2, by2) - max(ay1, by1)) > 0
+
+
+def _subtract_overlap_xyxy(sx1: float, sy1: float, sx2: float, sy2: float,
+                           ox1: float, oy1: float, ox2: float, oy2: float) -> Tuple[float, float, float, float, bool]:
+    """Вычесть из src перекрытие с other по вертикали; последний элемент — не пуст ли результат."""
+    if not _intersects_xyxy(sx1, sy1, sx2, sy2, ox1, oy1, ox2, oy2):
+        return sx1, sy1, sx2, sy2, True
+    if sy1 < oy1 < sy2:
+        nx1, ny1, nx2, ny2 = sx1, sy1, sx2, oy1
+    else:
+        nx1, ny1, nx2, ny2 = sx1, oy2, sx2, sy2
+    return nx1, ny1, nx2, ny2, (nx2 - nx1) > 0 and (ny2 - ny1) > 0
+
+def _render_page(pdf_path: str, page_number: int, dpi: int) -> Image.Image:
+    """Отрендерить одну страницу PDF."""
+    return convert_from_path(pdf_path, dpi=dpi, fmt="png", first_page=page_number + 1, last_page=page_number + 1)[0]
+
+
+@functools.lru_cache(maxsize=1)
+def _render_page_cached(pdf_path: str, mtime: float, page_number: int, dpi: int) -> Image.Image:
+    """Отрендерить одну страницу PDF; mtime входит в ключ кэша, чтобы изменённый файл рендерился заново.
+    Страница при 300 DPI занимает десятки мегабайт, поэтому в каждом процессе хранится только последняя.
+    """
+    return _render_page(pdf_path, page_number, dpi)
+
 
 class BoxProtocol(Protocol):
     @property
@@ -14,95 +56,146 @@ class BoxProtocol(Protocol):
     score: float
 
 
+@dataclass
+class BoxArray:
+    """Боксы макета как параллельные массивы: координаты (N, 4), score (N,) и типы (N,).
+    Геометрия считается над массивами целиком; TextBlock создаются только при возврате Layout.
+    """
+    xyxy: np.ndarray
+    scores: np.ndarray
+    types: np.ndarray
+
+    @classmethod
+    def from_layout(cls, layout: Iterable[Any]) -> "BoxArray":
+        """Разложить боксы layout'а по массивам."""
+        blocks = list(layout)
+        return cls(
+            xyxy=np.asarray([b.coordinates for b in blocks], dtype=np.float64).reshape(-1, 4),
+            scores=np.asarray([getattr(b, "score", 0.0) for b in blocks], dtype=np.float64),
+            types=np.asarray([getattr(b, "type", None) for b in blocks], dtype=object),
+        )
+
+    def __len__(self) -> int:
+        return len(self.xyxy)
+
+    @property
+    def areas(self) -> np.ndarray:
+        """Площади боксов, как Rectangle.area: (x2 - x1) * (y2 - y1)."""
+        x1, y1, x2, y2 = self.xyxy.T
+        return (x2 - x1) * (y2 - y1)
+
+    def take(self, indices: Any) -> "BoxArray":
+        """Подмножество боксов по индексам или маске."""
+        return BoxArray(self.xyxy[indices], self.scores[indices], self.types[indices])
+
+    def to_layout(self) -> "Layout":
+        """Собрать Layout из TextBlock."""
+        return Layout([
+            TextBlock(Rectangle(x1, y1, x2, y2), type=t, score=s)
+            for (x1, y1, x2, y2), s, t in zip(self.xyxy.tolist(), self.scores.tolist(), self.types.tolist())
+        ])
+
+
 class LayoutAnalyzer:
     """Единый класс для анализа layout'а PDF документов с resolved режимом."""
     
-    def __init__(self, model_name: str = "prima", extra_config: Optional[List[str]] = None, weights_dir: str = "weights"):
+    def __init__(self, model_name: str = DEFAULT_LAYOUT_MODEL, extra_config: Optional[List[str]] = None, weights_dir: str = "weights",
+                 device: Optional[str] = None):
         self.model_name = model_name
         self.extra_config = extra_config or []
         self.weights_dir = weights_dir
+        self.device = device
         self._model: Optional["lp.Detectron2LayoutModel"] = None
 
     def _get_model(self) -> "lp.Detectron2LayoutModel":
-        """Ленивая инициализация модели."""
+        """Ленивая инициализация модели (общей для всех анализаторов процесса)."""
         if self._model is None:
-            model_configs = get_model_configs(self.weights_dir)
-            
-            if self.model_name not in model_configs:
-                raise ValueError(f"Unknown model name: {self.model_name}. Available: {list(model_configs.keys())}")
-            cfg = model_configs[self.model_name]
-            self._model = lp.models.Detectron2LayoutModel(
-                config_path=cfg["config_path"],
-                label_map=cfg["label_map"],
-                extra_config=self.extra_config,
-                model_path=cfg.get("weights_path")
-            )
+            self._model = get_layout_model(self.model_name, self.weights_dir, tuple(self.extra_config), self.device)
         return self._model
 
     
     def _box_area(self, b: BoxProtocol) -> float:
-        x1, y1, x2, y2 = b.coordinates
-        return max(0.0, x2 - x1) * max(0.0, y2 - y1)
-
-    def _contains(self, outer: BoxProtocol, inner: BoxProtocol, tol: int = 0) -> bool:
-        ox1, oy1, ox2, oy2 = outer.coordinates
-        ix1, iy1, ix2, iy2 = inner.coordinates
-        return (ix1 >= ox1 - tol and iy1 >= oy1 - tol and ix2 <= ox2 + tol and iy2 <= oy2 + tol)
-
-    def _iou(self, el1: BoxProtocol, el2: BoxProtocol) -> float:
-        x11, y11, x12, y12 = el1.coordinates
-        x21, y21, x22, y22 = el2.coordinates
-
-        xi1, yi1 = max(x11, x21), max(y11, y21)
-        xi2, yi2 = min(x12, x22), min(y12, y22)
-
-        inter_w = max(0.0, xi2 - xi1)
-        inter_h = max(0.0, yi2 - yi1)
-        inter_area = inter_w * inter_h
-
-        area1 = self._box_area(el1)
-        area2 = self._box_area(el2)
-        union_area = area1 + area2 - inter_area
-        return inter_area / union_area if union_area > 0 else 0.0
-
-    def _containment_ratio(self, inner: BoxProtocol, outer: BoxProtocol) -> float:
-        """Доля площади inner, покрытая пересечением с outer."""
-        ix1, iy1, ix2, iy2 = inner.coordinates
-        ox1, oy1, ox2, oy2 = outer.coordinates
-
-        xi1, yi1 = max(ix1, ox1), max(iy1, oy1)
-        xi2, yi2 = min(ix2, ox2), min(iy2, oy2)
-        inter_area = max(0.0, xi2 - xi1) * max(0.0, yi2 - yi1)
-
-        inner_area = self._box_area(inner)
-        return inter_area / inner_area if inner_area > 0 else 0.0
+        return _area_xyxy(*b.coordinates)
 
     def _sorted_by_score_then_area(self, boxes: Iterable[BoxProtocol]) -> List[BoxProtocol]:
         """Сортировка боксов по убыванию score и площади."""
         return sorted(boxes, key=lambda b: (-getattr(b, "score", 0.0), -self._box_area(b)))
 
-    def _suppress_with_rules(self, selected: "Layout", candidate: BoxProtocol, 
-                           *, const_thresh: float, iou_thresh: float, tol: int) -> bool:
-        """Проверяет, нужно ли отбраковать кандидата из-за конфликтов."""
-        for sel in selected:
-            if (self._contains(sel, candidate, tol=tol) or self._containment_ratio(candidate, sel) >= const_thresh or self._iou(candidate, sel) >= iou_thresh): return True
-        return False
-
-    def _remove_superseded(self, selected: "Layout", keeper: BoxProtocol, 
-                          *, const_thresh: float, iou_thresh: float, tol: int) -> "Layout":
-        """Удаляет боксы, вытесненные новым keeper'ом."""
-        remain = [sel for sel in selected if not self._conflict(keeper, sel, const_thresh=const_thresh, iou_thresh=iou_thresh, tol=tol)]
-        return Layout(remain)
+    def _conflicts(self, box: np.ndarray, selected: np.ndarray, *, const_thresh: float, iou_thresh: float, tol: int) -> Tuple[bool, np.ndarray]:
+        """Конфликты бокса-кандидата со всеми уже выбранными боксами (векторно по selected).
+        Возвращает флаг подавления кандидата и маску выбранных боксов, вытесняемых кандидатом.
+        """
+        x1, y1, x2, y2 = box
+        sx1, sy1, sx2, sy2 = selected.T
+        inter = np.maximum(0.0, np.minimum(x2, sx2) - np.maximum(x1, sx1)) * np.maximum(0.0, np.minimum(y2, sy2) - np.maximum(y1, sy1))
+        area = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+        sel_areas = np.maximum(0.0, sx2 - sx1) * np.maximum(0.0, sy2 - sy1)
+
+        union = area + sel_areas - inter
+        iou = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+        cand_ratio = inter / area if area > 0 else np.zeros_like(inter)
+        sel_ratio = np.divide(inter, sel_areas, out=np.zeros_like(inter), where=sel_areas > 0)
+
+        inside_sel = (x1 >= sx1 - tol) & (y1 >= sy1 - tol) & (x2 <= sx2 + tol) & (y2 <= sy2 + tol)
+        suppress = bool(np.any(inside_sel | (cand_ratio >= const_thresh) | (iou >= iou_thresh)))
+        contains_sel = (sx1 >= x1 - tol) & (sy1 >= y1 - tol) & (sx2 <= x2 + tol) & (sy2 <= y2 + tol)
+        superseded = contains_sel | (sel_ratio >= const_thresh) | (iou >= iou_thresh)
+        return suppress, superseded
 
-    
     def _render_pdf_pages(self, pdf_path: str, dpi: int = DEFAULT_DPI) -> List[Image.Image]:
         """Конвертирует все страницы PDF в список PIL.Image."""
         return convert_from_path(pdf_path, dpi=dpi, fmt="png")
 
-    def _detect_on_image(self, page_img: Image.Image) -> "lp.Layout":
+    def _render_page_batch(self, pdf_path: str, page_numbers: List[int], dpi: int = DEFAULT_DPI) -> List[Image.Image]:
+        """Отрендерить страницы page_numbers; идущие подряд страницы рендерятся одним вызовом pdftoppm."""
+        first, last = page_numbers[0], page_numbers[-1]
+        if page_numbers == list(range(first, last + 1)):
+            return convert_from_path(pdf_path, dpi=dpi, fmt="png", first_page=first + 1, last_page=last + 1)
+        return [_render_page(pdf_path, i, dpi) for i in page_numbers]
+
+    def _render_one_page(self, pdf_path: str, page_number: int, dpi: int = DEFAULT_DPI) -> Image.Image:
+        """Отрендерить одну страницу PDF; последняя отрендеренная страница кэшируется."""
+        return _render_page_cached(pdf_path, os.path.getmtime(pdf_path), page_number, dpi)
+
+    def _detect_on_image(self, page_img: Union[Image.Image, np.ndarray]) -> "lp.Layout":
         """Детекция макета на одной странице-изображении."""
         model = self._get_model()
-        return model.detect(page_img)
+        with self._autocast(model):
+            return model.detect(page_img)
+
+    def _autocast(self, model: "lp.Detectron2LayoutModel") -> contextlib.AbstractContextManager:
+        """FP16 autocast для инференса на GPU; на CPU — пустой контекст."""
+        if not str(model.cfg.MODEL.DEVICE).startswith("cuda"):
+            return contextlib.nullcontext()
+        import torch
+        return torch.autocast(device_type="cuda", dtype=torch.float16)
+
+    def _detect_on_images(self, images: List[Union[Image.Image, np.ndarray]], batch_size: int = 4) -> List["lp.Layout"]:
+        """Пакетная детекция макета: один прямой проход Detectron2 на batch_size страниц.
+        Предобработка повторяет DefaultPredictor, постобработка — Detectron2LayoutModel.detect.
+        """
+        import torch
+
+        model = self._get_model()
+        predictor = model.model
+        layouts: List["lp.Layout"] = []
+        for start in range(0, len(images), batch_size):
+            inputs = []
+            for img in images[start:start + batch_size]:
+                arr = model.image_loader(img)
+                if predictor.input_format == "RGB":
+                    arr = arr[:, :, ::-1]
+                height, width = arr.shape[:2]
+                tensor = predictor.aug.get_transform(arr).apply_image(arr)
+                inputs.append({
+                    "image": torch.as_tensor(tensor.astype("float32").transpose(2, 0, 1)),
+                    "height": height,
+                    "width": width,
+                })
+            with torch.no_grad(), self._autocast(model):
+                outputs = predictor.model(inputs)
+            layouts.extend(model.gather_output(out) for out in outputs)
+        return layouts
 
     def _filter_layout_by_score(self, layout: "Layout", score_threshold: float) -> "Layout":
         """Фильтрация боксов по минимальному значению score."""
@@ -118,56 +211,53 @@ class LayoutAnalyzer:
     
     def _hierarchical_filter(self, layout: "Layout", min_score: float = 0.2, 
                            const_tresh: float = 0.9, iou_thresh: float = 0.4, tol: int = 0) -> "Layout":
-        """Иерархическая фильтрация перекрывающихся боксов."""
+        """Иерархическая фильтрация перекрывающихся боксов.
+        Кандидат отбрасывается, если он внутри выбранного бокса, почти целиком им покрыт или сильно с ним пересекается;
+        иначе он вытесняет выбранные боксы, находящиеся в таком же отношении к нему.
+        """
         candidates = [b for b in layout if getattr(b, "score", 0.0) >= min_score]
-        candidates = self._sorted_by_score_then_area(candidates)
-
-        selected = Layout()
-        for box in candidates:
-            if self._suppress_with_rules(selected, box, const_thresh=const_tresh, iou_thresh=iou_thresh, tol=tol):
-                continue
-            selected = self._remove_superseded(selected, box, const_thresh=const_tresh, iou_thresh=iou_thresh, tol=tol)
-            selected.append(box)
-        return selected
+        boxes = BoxArray.from_layout(self._sorted_by_score_then_area(candidates))
+        coords = boxes.xyxy
+
+        selected: List[int] = []
+        for i in range(len(boxes)):
+            if selected:
+                suppress, superseded = self._conflicts(coords[i], coords[selected], const_thresh=const_tresh, iou_thresh=iou_thresh, tol=tol)
+                if suppress:
+                    continue
+                selected = [j for j, drop in zip(selected, superseded) if not drop]
+            selected.append(i)
+        return boxes.take(selected).to_layout()
 
     
-    def _rect_intersects(self, r1: Rectangle, r2: Rectangle) -> bool:
-        """Проверяет пересечение двух прямоугольников."""
-        xi1 = max(r1.x_1, r2.x_1)
-        yi1 = max(r1.y_1, r2.y_1)
-        xi2 = min(r1.x_2, r2.x_2)
-        yi2 = min(r1.y_2, r2.y_2)
-        return (xi2 - xi1) > 0 and (yi2 - yi1) > 0
-
-    def _subtract_overlap(self, src: Rectangle, other: Rectangle) -> Optional[Rectangle]:
-        """Вычитает перекрытие из исходного прямоугольника."""
-        if not self._rect_intersects(src, other):
-            return src
-        if src.y_1 < other.y_1 < src.y_2:
-            new_rect = Rectangle(src.x_1, src.y_1, src.x_2, other.y_1)
-        else:
-            new_rect = Rectangle(src.x_1, other.y_2, src.x_2, src.y_2)
-        if (new_rect.x_2 - new_rect.x_1) <= 0 or (new_rect.y_2 - new_rect.y_1) <= 0:
-            return None
-        return new_rect
-
-    def _resolve_overlaps(self, layout: "Layout") -> "Layout":
-        """Разрешает перекрытия между блоками."""
-        ordered = sorted(layout, key=lambda b: b.area)
-        resolved: List[TextBlock] = []
-        for blk in ordered:
-            rect = blk.block
-            for accepted in resolved:
-                if self._rect_intersects(rect, accepted.block):
-                    new_rect = self._subtract_overlap(rect, accepted.block)
-                    if new_rect is None:
-                        rect = None
+    def _resolve_overlaps(self, layout: "Layout", scalar_below: int = 16) -> "Layout":
+        """Разрешает перекрытия между блоками.
+        Вычитание только уменьшает прямоугольник, поэтому проверять нужно лишь принятые блоки,
+        пересекающиеся с исходным; при scalar_below и более принятых блоках они отбираются векторно.
+        """
+        boxes = BoxArray.from_layout(layout)
+        boxes = boxes.take(np.argsort(boxes.areas, kind="stable"))
+        src = boxes.xyxy.tolist()
+        out = np.empty_like(boxes.xyxy)
+        kept: List[int] = []
+        for i, (x1, y1, x2, y2) in enumerate(src):
+            candidates: Iterable[int] = range(len(kept))
+            if len(kept) >= scalar_below:
+                ax1, ay1, ax2, ay2 = out[:len(kept)].T
+                hits = ((np.minimum(x2, ax2) - np.maximum(x1, ax1)) > 0) & ((np.minimum(y2, ay2) - np.maximum(y1, ay1)) > 0)
+                candidates = np.flatnonzero(hits).tolist()
+            valid = True
+            for j in candidates:
+                ox1, oy1, ox2, oy2 = out[j].tolist()
+                if _intersects_xyxy(x1, y1, x2, y2, ox1, oy1, ox2, oy2):
+                    x1, y1, x2, y2, valid = _subtract_overlap_xyxy(x1, y1, x2, y2, ox1, oy1, ox2, oy2)
+                    if not valid:
                         break
-                    rect = new_rect
-            if rect is None:
+            if not valid:
                 continue
-            resolved.append(TextBlock(rect, type=blk.type, score=getattr(blk, "score", 0.0)))
-        return Layout(resolved)
+            out[len(kept)] = (x1, y1, x2, y2)
+            kept.append(i)
+        return BoxArray(out[:len(kept)], boxes.scores[kept], boxes.types[kept]).to_layout()
 
     def _rect_to_image_xy(self, rect: fitz.Rect, page_height_pt: float, scale: float) -> Tuple[float, float, float, float]:
         """Преобразование координат из PDF в изображение.
@@ -180,33 +270,54 @@ class LayoutAnalyzer:
         return x1, y1, x2, y2
 
     def _attach_text(self, blocks: List[Dict[str, Any]], page: "fitz.Page", scale: float) -> None:
-        """Присоединяет текст к блокам layout'а."""
+        """Присоединяет текст к блокам layout'а.
+        Каждый span попадает в первый по порядку блок, с которым пересекается; пересечения
+        всех span'ов со всеми блоками считаются одной матрицей (S, B).
+        """
+        if not blocks:
+            return
         page_h_pt = page.rect.height
         page_h_px = page_h_pt * scale
 
-        def to_px_flipped(rect_pt: fitz.Rect) -> Rectangle:
-            x1, y1, x2, y2 = self._rect_to_image_xy(rect_pt, page_h_pt, scale)
-            return Rectangle(x1, page_h_px - y2, x2, page_h_px - y1)
-
+        texts: List[str] = []
+        span_bboxes: List[Tuple[float, float, float, float]] = []
         for blk in page.get_text("dict").get("blocks", []):
             for ln in blk.get("lines", []):
                 for sp in ln.get("spans", []):
                     txt = (sp.get("text") or "").strip()
-                    if not txt:
-                        continue
-                    span_rect_px = to_px_flipped(fitz.Rect(sp["bbox"]))
-                    for target in blocks:
-                        if self._rect_intersects(span_rect_px, Rectangle(*target["bbox_px"])):
-                            target["text"] += txt + " "
-                            break
+                    if txt:
+                        texts.append(txt)
+                        span_bboxes.append(sp["bbox"])
+        if not texts:
+            return
+
+        x0, y0, x1, y1 = np.asarray(span_bboxes, dtype=np.float64).T
+        sx1, sx2 = x0 * scale, x1 * scale
+        sy1 = page_h_px - (page_h_pt - y0) * scale
+        sy2 = page_h_px - (page_h_pt - y1) * scale
+        bx1, by1, bx2, by2 = np.asarray([t["bbox_px"] for t in blocks], dtype=np.float64).T
+
+        hits = ((np.minimum(sx2[:, None], bx2) - np.maximum(sx1[:, None], bx1)) > 0) & \
+               ((np.minimum(sy2[:, None], by2) - np.maximum(sy1[:, None], by1)) > 0)
+        has_hit = hits.any(axis=1)
+        first_hit = hits.argmax(axis=1)
+        for txt, ok, j in zip(texts, has_hit, first_hit):
+            if ok:
+                blocks[j]["text"] += txt + " "
 
     
     def analyze_page_hierarchical(self, pdf_path: str, page_number: int = 0, 
                                 min_score: float = 0.2, const_tresh: float = 0.8, 
-                                iou_thresh: float = 0.9, tol: int = 5) -> Tuple[Image.Image, "Layout"]:
-        """Анализ одной страницы с иерархической фильтрацией перекрытий."""
-        image = self._render_pdf_pages(pdf_path)[page_number]
-        raw_layout = self._detect_on_image(image)
+                                iou_thresh: float = 0.9, tol: int = 5,
+                                image: Optional[Union[Image.Image, np.ndarray]] = None,
+                                detected: Optional["Layout"] = None) -> Tuple[Image.Image, "Layout"]:
+        """Анализ одной страницы с иерархической фильтрацией перекрытий.
+        image — уже отрендеренная с DEFAULT_DPI страница; если не передано, страница рендерится здесь.
+        detected — результат детекции для image (например, из _detect_on_images).
+        """
+        if image is None:
+            image = self._render_one_page(pdf_path, page_number)
+        raw_layout = detected if detected is not None else self._detect_on_image(image)
         filtered = self._hierarchical_filter(raw_layout, min_score=min_score, 
                                            const_tresh=const_tresh, iou_thresh=iou_thresh, tol=tol)
         vis = self._visualize_layout(image, filtered, box_width=3)
@@ -214,11 +325,13 @@ class LayoutAnalyzer:
 
     def analyze_page_with_resolved_text(self, pdf_path: str, page_number: int = 0, 
                                       min_score: float = 0.05, const_tresh: float = 0.8, 
-                                      iou_thresh: float = 0.9, tol: int = 2) -> List[Dict[str, Any]]:
+                                      iou_thresh: float = 0.9, tol: int = 2,
+                                      image: Optional[Union[Image.Image, np.ndarray]] = None,
+                                      detected: Optional["Layout"] = None) -> List[Dict[str, Any]]:
         """Анализ страницы с resolved текстом."""
         _, raw_layout = self.analyze_page_hierarchical(
             pdf_path, page_number=page_number, min_score=min_score, 
-            const_tresh=const_tresh, iou_thresh=iou_thresh, tol=tol
+            const_tresh=const_tresh, iou_thresh=iou_thresh, tol=tol, image=image, detected=detected
         )
         resolved_layout = self._resolve_overlaps(raw_layout)
 
@@ -236,21 +349,46 @@ class LayoutAnalyzer:
 
     def analyze_page_with_resolved_layout(self, pdf_path: str, page_number: int = 0, 
                                         min_score: float = 0.05, const_tresh: float = 0.8, 
-                                        iou_thresh: float = 0.9, tol: int = 2) -> Tuple[List[Dict[str, Any]], Image.Image]:
+                                        iou_thresh: float = 0.9, tol: int = 2,
+                                        image: Optional[Union[Image.Image, np.ndarray]] = None,
+                                        detected: Optional["Layout"] = None) -> Tuple[List[Dict[str, Any]], Image.Image]:
         """Анализ страницы с resolved layout'ом и визуализацией."""
+        if image is None:
+            image = self._render_one_page(pdf_path, page_number)
         blocks = self.analyze_page_with_resolved_text(
             pdf_path, page_number, min_score=min_score, 
-            const_tresh=const_tresh, iou_thresh=iou_thresh, tol=tol
+            const_tresh=const_tresh, iou_thresh=iou_thresh, tol=tol, image=image, detected=detected
         )
-        image = self._render_pdf_pages(pdf_path)[page_number]
         layout = Layout([TextBlock(Rectangle(*b["bbox_px"]), type=b["type"], text=b["text"]) for b in blocks])
         vis = self._visualize_layout(image, layout)
         return blocks, vis
 
+    def analyze_pages_with_resolved_layout(self, pdf_path: str, page_numbers: Optional[Iterable[int]] = None,
+                                           batch_size: int = 8, **kwargs: Any) -> List[Tuple[List[Dict[str, Any]], Image.Image]]:
+        """Анализ нескольких страниц с resolved layout'ом.
+        Страницы рендерятся и проходят детекцию пачками по batch_size, поэтому в памяти одновременно
+        находятся отрендеренные изображения только одной пачки; остальные параметры передаются
+        в analyze_page_with_resolved_layout.
+        """
+        if page_numbers is None:
+            with fitz.open(pdf_path) as doc:
+                page_numbers = range(doc.page_count)
+        page_numbers = list(page_numbers)
+        results: List[Tuple[List[Dict[str, Any]], Image.Image]] = []
+        for start in range(0, len(page_numbers), batch_size):
+            batch = page_numbers[start:start + batch_size]
+            images = self._render_page_batch(pdf_path, batch)
+            layouts = self._detect_on_images(images, batch_size=batch_size)
+            results.extend(
+                self.analyze_page_with_resolved_layout(pdf_path, i, image=image, detected=layout, **kwargs)
+                for i, image, layout in zip(batch, images, layouts)
+            )
+        return results
+
     def analyze_pdf_simple(self, pdf_path: str, page_number: int = 0, 
                          score_threshold: float = 0.5) -> Tuple[Image.Image, "Layout"]:
         """Простой анализ одной страницы без иерархической фильтрации."""
-        image = self._render_pdf_pages(pdf_path)[page_number]
+        image = self._render_one_page(pdf_path, page_number)
         layout = self._detect_on_image(image)
         filtered = self._filter_layout_by_score(layout, score_threshold)
         vis = self._visualize_layout(image, filtered, box_width=3)
@@ -260,4 +398,4 @@ class LayoutAnalyzer:
         """Сохраняет набор размеченных страниц как единый PDF."""
         if not vis_pages:
             raise ValueError("Empty list of pages")
-        vis_pages[0].save(output_path, "PDF", resolution=100.0, save_all=True, append_images=vis_pages[1:])
+        save_images_as_pdf(vis_pages, output_path)
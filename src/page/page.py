@@ -1,19 +1,83 @@
 import fitz
-from typing import Tuple, Dict, Any, List, Optional
-from page.extractors import TextExtractor, TableExtractor, LinkExtractor, ImageExtractor, TitleExtractor
+import numpy as np
+from itertools import repeat
+from typing import Tuple, Dict, Any, Iterable, List, Optional
+from page.extractors import PageContentCache, TextExtractor, TableExtractor, LinkExtractor, ImageExtractor, TitleExtractor
 from page.layout_analyzer import LayoutAnalyzer
+from layoutparser.elements import Layout
+from utils.utils import dumps_json, ensure_dir
 import os
+import threading
+import weakref
+
+_LAYOUT_ANALYZER_CACHE: Dict[str, LayoutAnalyzer] = {}
+_LAYOUT_ANALYZER_LOCK = threading.Lock()
+
+# Результаты Page.extract_all_images: (путь к PDF, папка) -> (mtime файла, изображения по страницам).
+_IMAGE_BATCHES: Dict[Tuple[str, str], Tuple[Optional[int], List[List[Dict[str, Any]]]]] = {}
+
+
+def _file_mtime(path: str) -> Optional[int]:
+    """Время изменения файла в наносекундах или None, если файл недоступен."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _get_layout_analyzer(weights_dir: str) -> LayoutAnalyzer:
+    """Общий для процесса LayoutAnalyzer для weights_dir; создаётся при первом обращении."""
+    with _LAYOUT_ANALYZER_LOCK:
+        analyzer = _LAYOUT_ANALYZER_CACHE.get(weights_dir)
+        if analyzer is None:
+            analyzer = _LAYOUT_ANALYZER_CACHE[weights_dir] = LayoutAnalyzer(weights_dir=weights_dir)
+        return analyzer
+
 
 class Page:
-    def __init__(self, pdf_path: str, page: "fitz.Page"):
+    __slots__ = ("pdf_path", "page", "_owns_doc", "_doc", "_content_cache", "_extractors", "_saved_images", "_finalizer", "__weakref__")
+
+    def __init__(self, pdf_path: str, page_index: int, doc: Optional[fitz.Document] = None, saved_images: Optional[Dict[Tuple[str, int], Tuple[str, int, int, str]]] = None):
+        """Страница page_index документа pdf_path.
+        Если doc не передан, документ открывается здесь и закрывается в close(), при выходе из with
+        или, если страницу не закрыли явно, когда она собирается сборщиком мусора.
+        saved_images — общий для страниц документа словарь уже сохранённых изображений (см. ImageExtractor.extract_images).
+        """
         self.pdf_path = pdf_path
-        self.page = page
-        self._text_extractor = TextExtractor(page)
-        self._table_extractor = TableExtractor(page)
-        self._link_extractor = LinkExtractor(page)
-        self._image_extractor = ImageExtractor(page)
-        self._title_extractor = TitleExtractor(page)
-        self._layout_analyzer = None
+        self._saved_images = saved_images
+        self._owns_doc = doc is None
+        self._doc = fitz.open(pdf_path) if doc is None else doc
+        self._finalizer = weakref.finalize(self, self._doc.close) if self._owns_doc else None
+        self.page = page = self._doc[page_index]
+        self._content_cache = PageContentCache(page)
+        self._extractors: Dict[type, Any] = {}
+
+    def _extractor(self, cls: type) -> Any:
+        """Экстрактор класса cls для этой страницы; создаётся при первом обращении и делит кэш страницы."""
+        extractor = self._extractors.get(cls)
+        if extractor is None:
+            extractor = self._extractors[cls] = cls(self.page, self._content_cache)
+        return extractor
+
+    @property
+    def _text_extractor(self) -> TextExtractor:
+        return self._extractor(TextExtractor)
+
+    @property
+    def _table_extractor(self) -> TableExtractor:
+        return self._extractor(TableExtractor)
+
+    @property
+    def _link_extractor(self) -> LinkExtractor:
+        return self._extractor(LinkExtractor)
+
+    @property
+    def _image_extractor(self) -> ImageExtractor:
+        return self._extractor(ImageExtractor)
+
+    @property
+    def _title_extractor(self) -> TitleExtractor:
+        return self._extractor(TitleExtractor)
 
     def text_dict(self) -> Dict[str, Any]:
         """Получить текст страницы в виде словаря."""
@@ -23,9 +87,12 @@ class Page:
         """Получить таблицы и их bbox."""
         return self._table_extractor.extract_tables()
 
-    def text_blocks(self) -> List[Dict[str, Any]]:
-        """Получить структурированные текстовые блоки."""
-        _, table_bboxes = self.tables()
+    def text_blocks(self, table_bboxes: Optional[List[fitz.Rect]] = None) -> List[Dict[str, Any]]:
+        """Получить структурированные текстовые блоки.
+        table_bboxes — уже найденные bbox таблиц; если не переданы, берутся из tables().
+        """
+        if table_bboxes is None:
+            _, table_bboxes = self.tables()
         return self._text_extractor.get_structured_blocks(table_bboxes)
 
     def links(self) -> List[Dict[str, Any]]:
@@ -34,8 +101,41 @@ class Page:
         return self._link_extractor.extract_links(text_dict)
 
     def images(self, out_dir: str = "images") -> List[Dict[str, Any]]:
-        """Получить все изображения со страницы."""
-        return self._image_extractor.extract_images(out_dir)
+        """Получить все изображения со страницы.
+        Если изображения документа уже извлечены через extract_all_images в ту же папку, берутся оттуда.
+        """
+        batch = _IMAGE_BATCHES.get((os.path.abspath(self.pdf_path), out_dir))
+        if batch is not None and batch[0] == _file_mtime(self.pdf_path) and self.page.number < len(batch[1]):
+            return batch[1][self.page.number]
+        return self._image_extractor.extract_images(out_dir, self._saved_images)
+
+    @classmethod
+    def extract_all_images(cls, pdf_path: str, out_dir: str = "images", batch_size: int = 10) -> List[List[Dict[str, Any]]]:
+        """Извлечь изображения всех страниц документа, открыв его один раз.
+        Страницы обрабатываются пачками по batch_size: для пачки сначала читаются списки изображений
+        (get_images), затем изображения декодируются через doc.extract_image, после чего страницы пачки освобождаются.
+        Изображение, встречающееся на нескольких страницах (один xref), декодируется и сохраняется один раз.
+        Результат запоминается, и Page.images() с той же папкой берёт его, пока файл не изменился.
+        Возвращает списки изображений по страницам.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        mtime = _file_mtime(pdf_path)
+        saved_xrefs: Dict[Tuple[str, int], Tuple[str, int, int, str]] = {}
+        results: List[List[Dict[str, Any]]] = []
+        with fitz.open(pdf_path) as doc:
+            for start in range(0, doc.page_count, batch_size):
+                extractors = [ImageExtractor(doc[i]) for i in range(start, min(start + batch_size, doc.page_count))]
+                for extractor in extractors:
+                    extractor.cache.images()
+                results.extend(extractor.extract_images(out_dir, saved_xrefs) for extractor in extractors)
+        _IMAGE_BATCHES[(os.path.abspath(pdf_path), out_dir)] = (mtime, results)
+        return results
+
+    @classmethod
+    def clear_image_batches(cls) -> None:
+        """Забыть результаты extract_all_images."""
+        _IMAGE_BATCHES.clear()
 
     def captions(self) -> List[Dict[str, Any]]:
         """Получить подписи к изображениям."""
@@ -56,19 +156,26 @@ class Page:
 
     def as_dict(self, images_dir: str = "images") -> Dict[str, Any]:
         """Получить все данные страницы в виде словаря."""
-        tables_data, _ = self.tables()
+        tables_data, table_bboxes = self.tables()
         return {
             "page_number": self.page.number,
-            "text_blocks": self.text_blocks(),
+            "text_blocks": self.text_blocks(table_bboxes),
             "tables": tables_data,
             "links": self.links(),
             "image_captions": self.captions(),
             "images": self.images(out_dir=images_dir),
         }
 
-    def analyze_page(self, doc: fitz.Document, images_dir: str = "images", *, resolved: bool = False, vis_images: Optional[List] = None, weights_dir: str = "weights") -> Dict[str, Any]:
-        """Анализ страницы с выбором режима через флаг resolved."""
-        tables_data, _ = self.tables()
+    def as_bytes(self, images_dir: str = "images") -> bytes:
+        """Данные страницы (as_dict) сразу в виде JSON в UTF-8; через orjson, если он установлен."""
+        return dumps_json(self.as_dict(images_dir))
+
+    def analyze_page(self, doc: fitz.Document, images_dir: str = "images", *, resolved: bool = False, vis_images: Optional[List] = None, weights_dir: str = "weights", page_image: Optional[np.ndarray] = None, page_layout: Optional["Layout"] = None) -> Dict[str, Any]:
+        """Анализ страницы с выбором режима через флаг resolved.
+        page_image — заранее отрендеренная страница для resolved режима,
+        page_layout — уже выполненная для неё детекция макета.
+        """
+        tables_data, table_bboxes = self.tables()
         result = {
             "page_number": self.page.number,
             "tables": tables_data,
@@ -78,12 +185,10 @@ class Page:
         }
         
         if resolved:
-            if self._layout_analyzer is None:
-                self._layout_analyzer = LayoutAnalyzer(weights_dir=weights_dir)
-            blocks, vis_img = self._layout_analyzer.analyze_page_with_resolved_layout(
-                self.pdf_path, page_number=self.page.number
+            blocks, vis_img = _get_layout_analyzer(weights_dir).analyze_page_with_resolved_layout(
+                self.pdf_path, page_number=self.page.number, image=page_image, detected=page_layout
             )
-            os.makedirs(images_dir, exist_ok=True)
+            ensure_dir(images_dir)
             
             if vis_images is not None and vis_img is not None:
                 try:
@@ -97,16 +202,51 @@ class Page:
                 "annotated_image_path": "",
             })
         else:
-            result["text_blocks"] = self.text_blocks()
+            result["text_blocks"] = self.text_blocks(table_bboxes)
         
         return result
 
+    @classmethod
+    def analyze_pages_parallel(cls, pdf_path: str, page_numbers: Optional[Iterable[int]] = None, images_dir: str = "images",
+                               *, resolved: bool = False, weights_dir: str = "weights", num_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Проанализировать страницы документа (по умолчанию все) в пуле процессов.
+        Пул и воркер те же, что у Document: каждый процесс открывает документ и загружает модель один раз.
+        Результаты возвращаются в порядке page_numbers, страницы с ошибкой — как {"__error__", "traceback", "page_number"}.
+        В resolved режиме каждый воркер держит свою модель, поэтому воркеров не больше 4, иначе не больше 8.
+        """
+        # document.document импортирует page.page, поэтому импорт здесь, а не на уровне модуля.
+        from document.document import _create_executor, _worker_analyze_page
+
+        if page_numbers is None:
+            with fitz.open(pdf_path) as doc:
+                page_numbers = range(doc.page_count)
+        page_numbers = list(page_numbers)
+        if not page_numbers:
+            return []
+
+        if num_workers is None:
+            num_workers = min(os.cpu_count() or 1, 4 if resolved else 8)
+        workers = max(1, min(num_workers, len(page_numbers)))
+        chunksize = max(1, len(page_numbers) // (workers * 4))
+        with _create_executor(workers, resolved, weights_dir, pdf_path) as executor:
+            outputs = executor.map(_worker_analyze_page, repeat(pdf_path), page_numbers, repeat(images_dir), repeat(resolved), repeat(weights_dir), repeat(False), chunksize=chunksize)
+            return [res for _, res, _ in outputs]
+
     def clear_cache(self) -> None:
-        self._text_extractor._text_dict = None
-        self._text_extractor._clear_text_blocks = None
-        self._text_extractor._structured_blocks = None
-        self._table_extractor._tables_data = None
-        self._table_extractor._tables_bboxes = None
-        self._link_extractor._links = None
-        self._image_extractor._images = None
-        self._image_extractor._captions = None
\ No newline at end of file
+        """Освободить закэшированные результаты PyMuPDF и экстракторы; они пересоздаются при следующем обращении."""
+        self._content_cache.clear()
+        self._extractors.clear()
+
+    def __enter__(self):
+        """Вход в контекстный менеджер."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Выход из контекстного менеджера."""
+        self.close()
+
+    def close(self) -> None:
+        """Закрыть документ, если он был открыт самой страницей."""
+        if self._finalizer is not None:
+            self._finalizer()
+            self._doc = None
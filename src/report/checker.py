@@ -1,13 +1,47 @@
 import re
+import bisect
+from itertools import accumulate
 import fitz
-from typing import Tuple, List, Dict, Any
-from config.model_config import LETTER_PATTERN, NUMBER_PATTERN, SIMPLE_PATTERN, _E_RESOURCE_RE, _NUMBERED_PARAGRAPH_RE
-from page.extractors import TitleExtractor
+import numpy as np
+from typing import Tuple, List, Dict, Any, Optional
+from config.model_config import APPENDIX_RE, _E_RESOURCE_RE, _NUMBERED_PARAGRAPH_RE
+from page.extractors import PageContentCache, TitleExtractor
+
+
+def _px_to_pt(px: float, dpi: int) -> float:
+    """Перевести пиксели при разрешении dpi в пункты PDF (1/72 дюйма)."""
+    return px * 72.0 / dpi
+
+
+def _bbox_edges(blocks: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Верхние (y0) и нижние (y1) границы bbox блоков; для некорректного bbox — NaN."""
+    try:
+        coords = np.asarray([b.get("bbox") or (0, 0, 0, 0) for b in blocks], dtype=np.float64)
+        if coords.ndim == 2 and coords.shape[1] >= 4:
+            return coords[:, 1], coords[:, 3]
+    except (TypeError, ValueError):
+        pass
+    tops = np.full(len(blocks), np.nan)
+    bottoms = np.full(len(blocks), np.nan)
+    for i, b in enumerate(blocks):
+        bbox = b.get("bbox") or (0, 0, 0, 0)
+        try:
+            tops[i] = float(bbox[1])
+        except Exception:
+            pass
+        try:
+            bottoms[i] = float(bbox[3])
+        except Exception:
+            pass
+    return tops, bottoms
 
 class Checker:
-    def has_page_number(self, page: fitz.Page) -> Tuple[bool, int]:
-        """Проверить наличие номера страницы."""
-        page_texts = page.get_text("blocks")
+    def has_page_number(self, page: fitz.Page, cache: Optional[PageContentCache] = None) -> Tuple[bool, int]:
+        """Проверить наличие номера страницы.
+        cache — общий кэш страницы: блоки берутся из уже разобранного словаря текста без отдельного get_text("blocks").
+        Без кэша используется дешёвый get_text("blocks"), а не полный разбор словаря текста.
+        """
+        page_texts = cache.raw_blocks() if cache is not None else page.get_text("blocks")
         if not page_texts:
             return False, None
 
@@ -18,24 +52,24 @@ class Checker:
         return False, None
 
     def check_document_pages(self, pdf_path: str) -> bool:
-        """Проверить номера страниц во всем документе."""
-        doc = fitz.open(pdf_path)
-        pages_with_numbers = 0
-        count = 0
-        flag = False
-        all_pages = len(doc)
+        """Проверить номера страниц во всем документе.
+        Проверка сводится к тому, что в документе ровно одна страница оглавления (или нет страниц вовсе),
+        поэтому просмотр прекращается на второй найденной странице оглавления.
+        """
+        with fitz.open(pdf_path) as doc:
+            return self._check_toc_pages(doc)
+
+    def _check_toc_pages(self, doc: fitz.Document) -> bool:
+        """Ровно одна страница оглавления в уже открытом документе (или документ пуст)."""
+        if doc.page_count == 0:
+            return True
+        toc_pages = 0
         for page in doc:
             if TitleExtractor(page).is_toc_page():
-                flag = True
-                all_pages -= page.number
-            has_number, _ = self.has_page_number(page)
-            if has_number:
-                pages_with_numbers += 1
-            if flag:
-                count += 1
-
-        doc.close()
-        return count == all_pages
+                toc_pages += 1
+                if toc_pages > 1:
+                    return False
+        return toc_pages == 1
 
     def check_captions_under_images_page(self, page_json: Dict[str, Any]) -> Tuple[bool, int, int]:
         """Проверить подписи к изображениям на странице."""
@@ -50,42 +84,55 @@ class Checker:
         results = []
         
         for page in doc_json:
-            page_num = page.get("page_number")
-            ok, cap_count, img_count = self.check_captions_under_images_page(page)
-            results.append({
-                "page_number": page_num,
-                "ok": ok,
-                "captions": cap_count,
-                "images": img_count,
-                "missing_captions": max(0, img_count - cap_count)
-            })
-            all_pages_ok &= ok
+            result = self._captions_page_result(page)
+            results.append(result)
+            all_pages_ok &= result["ok"]
         
         return all_pages_ok, results
 
-    def check_correctness_appendix(self, page_json: Dict[str, Any]) -> bool:
-        """Проверить корректность приложения на странице."""
-        text_blocks = page_json.get("text_blocks", [])
-        all_text = " ".join([block.get("text", "") for block in text_blocks]).lower()
+    def _captions_page_result(self, page: Dict[str, Any]) -> Dict[str, Any]:
+        """Результат проверки подписей одной страницы для отчёта."""
+        ok, cap_count, img_count = self.check_captions_under_images_page(page)
+        return {
+            "page_number": page.get("page_number"),
+            "ok": ok,
+            "captions": cap_count,
+            "images": img_count,
+            "missing_captions": max(0, img_count - cap_count)
+        }
+
+    def _appendices_ok(self, all_text: str) -> bool:
+        """Упоминания приложений корректны: все с буквой (хотя бы одно) или ровно одно без буквы и номера.
+        Первое же приложение с номером решает результат, поэтому просмотр текста на нём прекращается.
+        """
+        simple_count = 0
+        has_letter = False
+        for m in APPENDIX_RE.finditer(all_text):
+            if m.lastgroup == "num":
+                return False
+            simple_count += 1
+            has_letter = has_letter or m.lastgroup == "letter"
+        return has_letter or simple_count == 1
 
-        letter_appendixes = LETTER_PATTERN.findall(all_text)
-        number_appendixes = NUMBER_PATTERN.findall(all_text)
-        simple_appendixes = SIMPLE_PATTERN.findall(all_text)
+    def _page_lowered_text(self, page_json: Dict[str, Any]) -> str:
+        """Текст всех блоков страницы через пробел в нижнем регистре."""
+        return " ".join([block.get("text", "") for block in page_json.get("text_blocks", [])]).lower()
 
-        if len(simple_appendixes) == 1 and len(letter_appendixes) == 0 and len(number_appendixes) == 0:
-            return True   
-        elif len(letter_appendixes) > 0 and len(number_appendixes) == 0:
-            return True   
-        else:
-            return False
+    def check_correctness_appendix(self, page_json: Dict[str, Any], all_text: Optional[str] = None) -> bool:
+        """Проверить корректность приложения на странице.
+        all_text — уже собранный _page_lowered_text(page_json), чтобы не собирать его повторно.
+        """
+        if all_text is None:
+            all_text = self._page_lowered_text(page_json)
+
+        return self._appendices_ok(all_text)
 
     def check_appendix(self, page_json: Dict[str, Any]) -> int:
         """Проверить приложение на странице."""
-        text_blocks = page_json.get("text_blocks", [])
-        all_text = " ".join([block.get("text", "") for block in text_blocks]).lower()
+        all_text = self._page_lowered_text(page_json)
         
-        if SIMPLE_PATTERN.search(all_text):
-            if self.check_correctness_appendix(page_json):
+        if APPENDIX_RE.search(all_text):
+            if self.check_correctness_appendix(page_json, all_text):
                 return 1  
             else:
                 return -1 
@@ -93,26 +140,8 @@ class Checker:
             return 0  
 
     def check_document_appendices(self, doc_pages: List[Dict[str, Any]]) -> bool:
-        """Проверить приложения во всем документе."""
-        has_valid = False
-        has_any_appendix = False
-
-        for page_json in doc_pages:
-            result = self.check_appendix(page_json)
-            if result == -1:
-                return False  
-            elif result == 1:
-                has_valid = True
-            elif result == 0:
-                text_blocks = page_json.get("text_blocks", [])
-                all_text = " ".join([block.get("text", "") for block in text_blocks]).lower()
-                if SIMPLE_PATTERN.search(all_text):
-                    has_any_appendix = True
-
-        if not has_any_appendix:
-            return True
-            
-        return has_valid
+        """Проверить приложения во всем документе: ни на одной странице нет некорректного приложения."""
+        return all(self.check_appendix(page_json) != -1 for page_json in doc_pages)
 
     def check_links(self, page_json: Dict[str, Any]) -> bool:
         """Проверить наличие 'электронный ресурс' рядом со ссылками."""
@@ -120,42 +149,36 @@ class Checker:
         if not links:
             return True
 
-        for link in links:
-            line_text = (link.get("text") or "").strip()
-            if not _E_RESOURCE_RE.search(line_text):
-                return False
-        return True
+        # Один проход регулярки по текстам всех ссылок, разделённым "\x00" (его не захватывает ни \w, ни \s);
+        # ссылка, к которой относится совпадение, находится бинарным поиском по смещениям начала текстов.
+        texts = [(link.get("text") or "").strip() for link in links]
+        starts = list(accumulate((len(t) + 1 for t in texts[:-1]), initial=0))
+        matched = {bisect.bisect_right(starts, m.start()) - 1 for m in _E_RESOURCE_RE.finditer("\x00".join(texts))}
+        return len(matched) == len(texts)
 
     def check_numbered_paragraph_spacing_page(self, page_json: Dict[str, Any], *, min_gap_pt: float = 8.0) -> Tuple[bool, List[Dict[str, Any]]]:
         """Проверить отступы нумерованных параграфов на странице."""
         blocks = page_json.get("text_blocks") or []
         problems: List[Dict[str, Any]] = []
-        if not blocks:
+        texts = [(b.get("text") or "").strip() for b in blocks]
+        nonempty = np.flatnonzero(np.fromiter((bool(t) for t in texts), dtype=bool, count=len(texts)))
+        if len(nonempty) < 2:
             return True, problems
 
-        for i, b in enumerate(blocks):
-            text = (b.get("text") or "").strip()
-            if not text:
-                continue
-            if _NUMBERED_PARAGRAPH_RE.match(text):
-                j = i - 1
-                while j >= 0 and not (blocks[j].get("text") or "").strip():
-                    j -= 1
-                if j >= 0:
-                    try:
-                        prev_bbox = blocks[j].get("bbox") or [0, 0, 0, 0]
-                        cur_bbox = b.get("bbox") or [0, 0, 0, 0]
-                        gap = float(cur_bbox[1]) - float(prev_bbox[3])
-                    except Exception:
-                        gap = min_gap_pt  
-                    if gap < min_gap_pt:
-                        problems.append({
-                            "block_id": b.get("id"),
-                            "gap_pt": gap,
-                            "required_pt": min_gap_pt,
-                            "prev_block_id": blocks[j].get("id"),
-                            "text": text[:80]
-                        })
+        # Предыдущий непустой блок для каждого непустого блока — его сосед в nonempty.
+        cur, prev = nonempty[1:], nonempty[:-1]
+        tops, bottoms = _bbox_edges(blocks)
+        gaps = tops[cur] - bottoms[prev]
+        numbered = np.fromiter((_NUMBERED_PARAGRAPH_RE.match(texts[i]) is not None for i in cur), dtype=bool, count=len(cur))
+        for k in np.flatnonzero(numbered & (gaps < min_gap_pt)):
+            i, j = cur[k], prev[k]
+            problems.append({
+                "block_id": blocks[i].get("id"),
+                "gap_pt": float(gaps[k]),
+                "required_pt": min_gap_pt,
+                "prev_block_id": blocks[j].get("id"),
+                "text": texts[i][:80]
+            })
         return len(problems) == 0, problems
 
     def check_numbered_paragraph_spacing_doc(self, doc_json: List[Dict[str, Any]], *, min_gap_pt: float = 8.0) -> Tuple[bool, List[Dict[str, Any]]]:
@@ -174,8 +197,7 @@ class Checker:
 
     def check_numbered_paragraph_spacing_page_px(self, page_json: Dict[str, Any], *, min_gap_px: float = 10.0, dpi: int = 300) -> Tuple[bool, List[Dict[str, Any]]]:
         """Проверить отступы нумерованных параграфов в пикселях."""
-        min_gap_pt = (min_gap_px * 72.0) / float(dpi)
-        return self.check_numbered_paragraph_spacing_page(page_json, min_gap_pt=min_gap_pt)
+        return self.check_numbered_paragraph_spacing_page(page_json, min_gap_pt=_px_to_pt(min_gap_px, dpi))
 
     def check_font(self) -> bool:
         pass
@@ -186,51 +208,101 @@ class Checker:
         all_ok = True
         
         for page in doc_json:
-            page_num = page.get("page_number", 0)
-            links = page.get("links", [])
-            
-            if not links:
-                results.append({
-                    "page_number": page_num,
-                    "ok": True,
-                    "links_count": 0,
-                    "problematic_links": []
-                })
-                continue
-            
-            problematic_links = []
-            for link in links:
-                pass 
-                # нужна сама логика проверки
-                
-            page_ok = len(problematic_links) == 0
-            if not page_ok:
+            result = self._links_page_result(page)
+            if not result["ok"]:
                 all_ok = False
-            
-            results.append({
-                "page_number": page_num,
-                "ok": page_ok,
-                "links_count": len(links),
-                "problematic_links": problematic_links
-            })
+            results.append(result)
         
         return all_ok, results
 
-    def check_document(self, pdf_path: str, doc_json: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Комплексная проверка документа."""
-        page_numbers_ok = self.check_document_pages(pdf_path)
-        appendices_ok = self.check_document_appendices(doc_json)
-        captions_ok, captions_results = self.check_captions_under_images_doc(doc_json)
-        links_ok, links_results = self.check_links_doc(doc_json)
-        # fonts_ok = self.check_font()
-        all_ok = page_numbers_ok and appendices_ok and captions_ok and links_ok
+    def _links_page_result(self, page: Dict[str, Any]) -> Dict[str, Any]:
+        """Результат проверки ссылок одной страницы для отчёта."""
+        page_num = page.get("page_number", 0)
+        links = page.get("links", [])
+        
+        if not links:
+            return {
+                "page_number": page_num,
+                "ok": True,
+                "links_count": 0,
+                "problematic_links": []
+            }
+        
+        problematic_links = []
+        for link in links:
+            pass 
+            # нужна сама логика проверки
+            
+        return {
+            "page_number": page_num,
+            "ok": len(problematic_links) == 0,
+            "links_count": len(links),
+            "problematic_links": problematic_links
+        }
+
+    def _scan_pdf_pages(self, doc: fitz.Document) -> Tuple[bool, List[bool]]:
+        """Проверка оглавления (см. _check_toc_pages) и наличие номера на каждой странице PDF.
+        Оба результата считаются по одному разбору текста страницы.
+        Страницы обходятся последовательно: PyMuPDF не потокобезопасен, и страницы одного
+        fitz.Document нельзя обрабатывать из нескольких потоков; для параллельности нужны процессы
+        со своим документом (см. Page.analyze_pages_parallel).
+        """
+        toc_pages = 0
+        has_numbers: List[bool] = []
+        for page in doc:
+            cache = PageContentCache(page)
+            if TitleExtractor(page, cache).is_toc_page():
+                toc_pages += 1
+            has_numbers.append(self.has_page_number(page, cache)[0])
+        return doc.page_count == 0 or toc_pages == 1, has_numbers
 
+    def _single_pass(self, pdf_path: str, doc_json: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Проверки документа за одно открытие PDF и один проход по страницам doc_json.
+        Кроме итогов, возвращает результаты по страницам: наличие номера для каждой страницы PDF
+        и результат check_appendix для каждой страницы doc_json.
+        """
+        with fitz.open(pdf_path) as doc:
+            page_numbers_ok, page_numbers_results = self._scan_pdf_pages(doc)
+
+        captions_ok = links_ok = True
+        appendices_results: List[int] = []
+        captions_results: List[Dict[str, Any]] = []
+        links_results: List[Dict[str, Any]] = []
+        for page in doc_json:
+            appendices_results.append(self.check_appendix(page))
+            captions = self._captions_page_result(page)
+            captions_results.append(captions)
+            captions_ok &= captions["ok"]
+            links = self._links_page_result(page)
+            links_results.append(links)
+            links_ok &= links["ok"]
         return {
-            "all_ok": all_ok,
             "page_numbers_ok": page_numbers_ok,
-            "appendices_ok": appendices_ok,
+            "page_numbers_results": page_numbers_results,
+            "appendices_ok": -1 not in appendices_results,
+            "appendices_results": appendices_results,
             "captions_ok": captions_ok,
             "captions_results": captions_results,
-            "links_ok": True,
+            "links_ok": links_ok,
             "links_results": links_results,
         }
+
+    def check_document(self, pdf_path: str, doc_json: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Комплексная проверка документа.
+        page_numbers_results и appendices_results — результаты по страницам, чтобы отчёт не пересчитывал проверки.
+        """
+        checks = self._single_pass(pdf_path, doc_json)
+        # fonts_ok = self.check_font()
+        all_ok = checks["page_numbers_ok"] and checks["appendices_ok"] and checks["captions_ok"] and checks["links_ok"]
+
+        return {
+            "all_ok": all_ok,
+            "page_numbers_ok": checks["page_numbers_ok"],
+            "page_numbers_results": checks["page_numbers_results"],
+            "appendices_ok": checks["appendices_ok"],
+            "appendices_results": checks["appendices_results"],
+            "captions_ok": checks["captions_ok"],
+            "captions_results": checks["captions_results"],
+            "links_ok": True,
+            "links_results": checks["links_results"],
+        }
@@ -1,5 +1,5 @@
 import os
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any
 from .checker import Checker
 
 
@@ -9,33 +9,30 @@ class Reporter:
     def __init__(self):
         self.checker = Checker()
 
-    def get_report(self, pdf_path: str, doc_json: List[Dict[str, Any]]) -> str:
-        """Сгенерировать текстовый отчет о проверке документа."""
+    def iter_report_lines(self, pdf_path: str, doc_json: List[Dict[str, Any]]) -> Iterator[str]:
+        """Строки текстового отчета о проверке документа по одной."""
         report_data = self.checker.check_document(pdf_path, doc_json)
-        report_lines = []
 
         if report_data["all_ok"]:
-            return "Все проверки пройдены."
+            yield "Все проверки пройдены."
+            return
 
         if not report_data["page_numbers_ok"]:
-            missing_numbers = []
-            for i, page in enumerate(doc_json):
-                has_number, _ = self.checker.has_page_number_from_json(page)
-                if not has_number:
-                    missing_numbers.append(page.get("page_number", i+1))
-            report_lines.append(f"Номера страниц отсутствуют на страницах: {missing_numbers}")
+            missing_numbers = [i for i, has_number in enumerate(report_data["page_numbers_results"]) if not has_number]
+            if missing_numbers:
+                yield f"Номера страниц отсутствуют на страницах: {missing_numbers}"
 
         if not report_data["appendices_ok"]:
-            bad_appendix_pages = []
-            for i, page in enumerate(doc_json):
-                result = self.checker.check_appendix(page)
-                if result == -1:
-                    bad_appendix_pages.append(page.get("page_number", i+1))
+            bad_appendix_pages = [
+                page.get("page_number", i+1)
+                for i, (page, result) in enumerate(zip(doc_json, report_data["appendices_results"]))
+                if result == -1
+            ]
 
             if bad_appendix_pages:
-                report_lines.append(f"Некорректные приложения на страницах: {bad_appendix_pages}")
+                yield f"Некорректные приложения на страницах: {bad_appendix_pages}"
             else:
-                report_lines.append("Приложения отсутствуют или не пронумерованы корректно.")
+                yield "Приложения отсутствуют или не пронумерованы корректно."
 
         if not report_data["captions_ok"]:
             missing_captions_pages = [
@@ -43,16 +40,18 @@ class Reporter:
                 for p in report_data["captions_results"] 
                 if not p["ok"]
             ]
-            report_lines.append(f"Проблемы с подписями к изображениям на страницах: {missing_captions_pages}")
+            yield f"Проблемы с подписями к изображениям на страницах: {missing_captions_pages}"
 
         if not report_data["links_ok"]:
             problematic_pages = [str(p["page_number"]) for p in report_data["links_results"] if not p["ok"] and p["links_count"] > 0]
             if problematic_pages:
-                report_lines.append(f"Некорректные ссылки на страницах: {', '.join(problematic_pages)}")
+                yield f"Некорректные ссылки на страницах: {', '.join(problematic_pages)}"
             else:
-                report_lines.append("Обнаружены проблемы со ссылками.")
+                yield "Обнаружены проблемы со ссылками."
 
-        return os.linesep.join(report_lines)
+    def get_report(self, pdf_path: str, doc_json: List[Dict[str, Any]]) -> str:
+        """Сгенерировать текстовый отчет о проверке документа."""
+        return os.linesep.join(self.iter_report_lines(pdf_path, doc_json))
 
     def get_detailed_report(self, pdf_path: str, doc_json: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Получить подробный отчет в виде словаря."""
@@ -71,7 +70,9 @@ class Reporter:
 
     def save_report(self, pdf_path: str, doc_json: List[Dict[str, Any]], output_path: str):
         """Сохранить отчет в файл."""
-        report = self.get_report(pdf_path, doc_json)
         with open(output_path, "w", encoding="utf-8") as f:
-            f.write(report)
+            for n, line in enumerate(self.iter_report_lines(pdf_path, doc_json)):
+                if n:
+                    f.write(os.linesep)
+                f.write(line)
 
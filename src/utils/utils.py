@@ -1,9 +1,26 @@
 """Утилиты для работы с PDF."""
+import io
 import os
-from typing import Tuple
+import json
+from typing import Any, Iterable, Set, Tuple
 
 import fitz
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_ENSURED_DIRS: Set[str] = set()
+
+
+def ensure_dir(path: str) -> None:
+    """Создать директорию, если её нет; для уже созданных в этом процессе путей не делает системных вызовов."""
+    if path not in _ENSURED_DIRS:
+        os.makedirs(path, exist_ok=True)
+        _ENSURED_DIRS.add(path)
+
 
 def rect_to_image_xy(rect: fitz.Rect, page_height_pt: float, 
                     scale: float) -> Tuple[float, float, float, float]:
@@ -57,4 +74,79 @@ def save_pdf_page(src_dir: str, page_start: int, page_end: int,
     out_pdf.close()
     doc.close()
 
-    return out_path
\ No newline at end of file
+    return out_path
+
+
+def _json_default(obj: Any) -> Any:
+    """Привести numpy-значения к типам, понятным json."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json(obj: Any) -> bytes:
+    """
+    Сериализовать объект в компактный JSON в UTF-8.
+
+    Использует orjson, если он установлен, иначе стандартный json.
+    Нестроковые ключи словарей, как и в json, приводятся к строкам.
+
+    Args:
+        obj: Сериализуемый объект.
+
+    Returns:
+        JSON в виде байтов.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+def loads_json(data: bytes) -> Any:
+    """
+    Разобрать JSON, полученный из dumps_json.
+
+    Args:
+        data: JSON в виде байтов.
+
+    Returns:
+        Разобранный объект.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def save_images_as_pdf(images: Iterable[Any], output_path: str,
+                       resolution: float = 100.0, jpeg_quality: int = 85) -> int:
+    """
+    Собрать PDF из изображений страниц, по одному изображению на страницу.
+
+    Изображения кодируются в JPEG и встраиваются через PyMuPDF, а не через
+    PDF-писатель PIL, который сжимает несжатый RGB на Python-стороне.
+
+    Args:
+        images: Изображения PIL.
+        output_path: Путь к выходному PDF.
+        resolution: Разрешение изображений в DPI, задаёт размер страницы.
+        jpeg_quality: Качество JPEG.
+
+    Returns:
+        Количество страниц в сохранённом PDF.
+    """
+    scale = 72.0 / resolution
+    out_pdf = fitz.open()
+    try:
+        for img in images:
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            buf = io.BytesIO()
+            img.save(buf, "JPEG", quality=jpeg_quality, optimize=True, progressive=True)
+            page = out_pdf.new_page(width=img.width * scale, height=img.height * scale)
+            page.insert_image(page.rect, stream=buf.getvalue())
+        if not len(out_pdf):
+            raise ValueError("Empty list of pages")
+        out_pdf.save(output_path, deflate=True, garbage=4)
+        return len(out_pdf)
+    finally:
+        out_pdf.close()
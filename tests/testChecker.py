@@ -0,0 +1,98 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import fitz
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from report.checker import Checker
+
+
+class TestChecker(unittest.TestCase):
+    def setUp(self):
+        self.checker = Checker()
+
+    def _blocks(self, *items):
+        return {"text_blocks": [{"id": i, "text": text, "bbox": [0, y0, 100, y1]} for i, (text, y0, y1) in enumerate(items)]}
+
+    def test_numbered_paragraph_spacing_nbsp(self):
+        page = self._blocks(("Текст", 0, 20), ("1.1\xa0Текст", 22, 40))
+        ok, problems = self.checker.check_numbered_paragraph_spacing_page(page, min_gap_pt=8.0)
+        self.assertFalse(ok)
+        self.assertEqual([1], [p["block_id"] for p in problems])
+
+    def test_appendix_word_boundary(self):
+        with self.subTest(case="word"):
+            self.assertEqual(1, self.checker.check_appendix({"text_blocks": [{"text": "См. Приложение А"}]}))
+        with self.subTest(case="inside word"):
+            self.assertEqual(0, self.checker.check_appendix({"text_blocks": [{"text": "Переприложение"}]}))
+
+    def test_numbered_paragraph_spacing(self):
+        page = self._blocks(
+            ("Введение", 0, 20),
+            ("", 20, 21),
+            ("1.1 Цель работы", 24, 40),
+            ("1.2 Задачи", 60, 80),
+            ("Обычный текст", 81, 90),
+        )
+        ok, problems = self.checker.check_numbered_paragraph_spacing_page(page, min_gap_pt=8.0)
+        self.assertFalse(ok)
+        expected = [{"block_id": 2, "gap_pt": 4.0, "required_pt": 8.0, "prev_block_id": 0, "text": "1.1 Цель работы"}]
+        self.assertEqual(expected, problems)
+
+        with self.subTest(case="px"):
+            ok, problems = self.checker.check_numbered_paragraph_spacing_page_px(page, min_gap_px=10.0, dpi=300)
+            self.assertTrue(ok)
+            self.assertEqual([], problems)
+
+        with self.subTest(case="bad bbox"):
+            page["text_blocks"][2]["bbox"] = None
+            page["text_blocks"][3]["bbox"] = [0, "x", 0, 0]
+            ok, problems = self.checker.check_numbered_paragraph_spacing_page(page, min_gap_pt=8.0)
+            self.assertEqual([2], [p["block_id"] for p in problems])
+
+        with self.subTest(case="single block"):
+            self.assertEqual((True, []), self.checker.check_numbered_paragraph_spacing_page(self._blocks(("1.1 Текст", 0, 10))))
+
+    def _toc_doc(self, pages: int) -> fitz.Document:
+        doc = fitz.open()
+        for _ in range(pages):
+            doc.new_page()
+        return doc
+
+    def test_toc_pages_early_exit(self):
+        with mock.patch("report.checker.TitleExtractor.is_toc_page", autospec=True, return_value=True) as is_toc:
+            with self._toc_doc(5) as doc:
+                self.assertFalse(self.checker._check_toc_pages(doc))
+            self.assertEqual(2, is_toc.call_count)
+
+        with mock.patch("report.checker.TitleExtractor.is_toc_page", autospec=True, side_effect=[False, True, False]) as is_toc:
+            with self._toc_doc(3) as doc:
+                self.assertTrue(self.checker._check_toc_pages(doc))
+            self.assertEqual(3, is_toc.call_count)
+
+        with self._toc_doc(0) as doc:
+            self.assertTrue(self.checker._check_toc_pages(doc))
+
+    def test_check_document_pages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = os.path.join(tmp, "empty_pages.pdf")
+            with self._toc_doc(2) as doc:
+                doc.save(pdf_path)
+            self.assertFalse(self.checker.check_document_pages(pdf_path))
+
+    def test_check_links(self):
+        cases = {
+            "no links": ([], True),
+            "all marked": ([{"text": "Сайт [Электронный ресурс]"}, {"text": "Курс. – Электронный ресурс. – URL"}], True),
+            "one unmarked": ([{"text": "Сайт [Электронный ресурс]"}, {"text": "Просто ссылка"}], False),
+            "split across links": ([{"text": "Сайт электронный"}, {"text": "ресурс"}], False),
+            "empty text": ([{"text": None}, {"text": "[Электронный ресурс]"}], False),
+        }
+        for name, (links, expected) in cases.items():
+            with self.subTest(case=name):
+                self.assertEqual(expected, self.checker.check_links({"links": links}))
+
+
+if __name__ == "__main__":
+    unittest.main()
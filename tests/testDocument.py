@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import fitz
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from document import document as document_module
+from page.page import Page
+
+
+class TestDocument(unittest.TestCase):
+    pdf_path = os.path.join(os.path.dirname(__file__), "testData", "dataText", "copyTwoText.pdf")
+
+    def test_open_pdf_without_memoryview_stream(self):
+        fitz_open = fitz.open
+
+        def old_fitz_open(*args, **kwargs):
+            if isinstance(kwargs.get("stream"), memoryview):
+                raise TypeError("bad type: 'stream'")
+            return fitz_open(*args, **kwargs)
+
+        with mock.patch.object(document_module.fitz, "open", side_effect=old_fitz_open):
+            doc, view = document_module._open_pdf(self.pdf_path)
+        try:
+            self.assertIsNone(view)
+            self.assertEqual(3, doc.page_count)
+        finally:
+            document_module._close_pdf(doc, view)
+
+    def test_extract_pages_parallel_matches_serial(self):
+        data_dir = os.path.join(os.path.dirname(__file__), "testData")
+        for pdf_path in (self.pdf_path, os.path.join(data_dir, "dataImages", "threeImage.pdf")):
+            with self.subTest(pdf=os.path.basename(pdf_path)), tempfile.TemporaryDirectory() as tmp:
+                with Page(pdf_path, 0) as first:
+                    page_count = first._doc.page_count
+                serial = []
+                for i in range(page_count):
+                    with Page(pdf_path, i) as page:
+                        serial.append(page.as_dict(os.path.join(tmp, "serial")))
+                parallel = document_module.extract_pages_parallel(pdf_path, images_dir=os.path.join(tmp, "parallel"), num_workers=2)
+                for page in serial + parallel:
+                    for img in page["images"]:
+                        img["path"] = os.path.basename(img["path"])
+                self.assertEqual(serial, parallel)
+
+    def test_extract_pages_parallel_errors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            results = document_module.extract_pages_parallel(self.pdf_path, [1, 7], images_dir=tmp, num_workers=2)
+        self.assertEqual(1, results[0]["page_number"])
+        self.assertEqual({"__error__", "traceback", "page_number"}, set(results[1]))
+        self.assertEqual(7, results[1]["page_number"])
+
+
+if __name__ == "__main__":
+    unittest.main()
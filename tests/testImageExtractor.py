@@ -1 +1,53 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import fitz
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from page.extractors import ImageExtractor
 
+
+class TestImageExtractor(unittest.TestCase):
+    def setUp(self):
+        self.pdf_path = os.path.join(os.path.dirname(__file__), "testData", "dataImages", "threeImage.pdf")
+        self.doc = fitz.open(self.pdf_path)
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.doc.close()
+        self._tmp.cleanup()
+
+    def test_saved_xrefs_shared_between_pages(self):
+        out_dir = os.path.join(self._tmp.name, "a")
+        other_dir = os.path.join(self._tmp.name, "b")
+        saved_xrefs = {}
+        with mock.patch.object(ImageExtractor, "_save_image_bytes", autospec=True, side_effect=ImageExtractor._save_image_bytes) as save:
+            first = ImageExtractor(self.doc[0]).extract_images(out_dir, saved_xrefs)
+            self.assertEqual(len(first), save.call_count)
+            self.assertEqual({(out_dir, img["xref"]) for img in first}, set(saved_xrefs))
+
+            second = ImageExtractor(self.doc[0]).extract_images(out_dir, saved_xrefs)
+            self.assertEqual(len(first), save.call_count)
+            self.assertEqual([img["path"] for img in first], [img["path"] for img in second])
+
+            third = ImageExtractor(self.doc[0]).extract_images(other_dir, saved_xrefs)
+            self.assertEqual(2 * len(first), save.call_count)
+        self.assertTrue(first)
+        for img in third:
+            self.assertEqual(other_dir, os.path.dirname(img["path"]))
+            self.assertTrue(os.path.isfile(img["path"]))
+
+    def test_images_written_as_raw_bytes(self):
+        images = ImageExtractor(self.doc[0]).extract_images(self._tmp.name)
+        self.assertTrue(images)
+        for img in images:
+            info = self.doc.extract_image(img["xref"])
+            with open(img["path"], "rb") as f:
+                self.assertEqual(info["image"], f.read())
+            self.assertEqual(f"img_p0_{img['xref']}.{info['ext']}", os.path.basename(img["path"]))
+            self.assertEqual((info["ext"], info["width"], info["height"]), (img["ext"], img["width"], img["height"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
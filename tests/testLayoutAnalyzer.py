@@ -0,0 +1,67 @@
+import os
+import sys
+import random
+import unittest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from layoutparser.elements import Layout, TextBlock, Rectangle
+from page.layout_analyzer import LayoutAnalyzer
+
+
+class TestLayoutAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = LayoutAnalyzer()
+
+    def _layout(self, *boxes):
+        return Layout([TextBlock(Rectangle(x1, y1, x2, y2), type=t, score=s) for (x1, y1, x2, y2), s, t in boxes])
+
+    def _boxes(self, layout):
+        return [(b.coordinates, b.type) for b in layout]
+
+    def test_hierarchical_filter(self):
+        layout = self._layout(
+            ((0, 0, 100, 100), 0.9, "Text"),
+            ((10, 10, 50, 50), 0.8, "Title"),
+            ((5, 0, 105, 100), 0.7, "Text"),
+            ((200, 200, 300, 300), 0.1, "Figure"),
+            ((200, 0, 300, 50), 0.6, "List"),
+        )
+        got = self._boxes(self.analyzer._hierarchical_filter(layout))
+        self.assertEqual([((0, 0, 100, 100), "Text"), ((200, 0, 300, 50), "List")], got)
+
+    def test_hierarchical_filter_supersedes_inner_box(self):
+        layout = self._layout(
+            ((10, 10, 50, 50), 0.9, "Title"),
+            ((0, 0, 100, 100), 0.5, "Text"),
+        )
+        got = self._boxes(self.analyzer._hierarchical_filter(layout))
+        self.assertEqual([((0, 0, 100, 100), "Text")], got)
+
+    def test_resolve_overlaps(self):
+        layout = self._layout(
+            ((0, 40, 100, 200), 0.9, "Text"),
+            ((0, 0, 100, 50), 0.8, "Title"),
+            ((300, 0, 400, 10), 0.7, "List"),
+        )
+        got = self._boxes(self.analyzer._resolve_overlaps(layout))
+        expected = [
+            ((300, 0, 400, 10), "List"),
+            ((0, 0, 100, 50), "Title"),
+            ((0, 50, 100, 200), "Text"),
+        ]
+        self.assertEqual(expected, got)
+
+    def test_resolve_overlaps_vectorized_matches_scalar(self):
+        rng = random.Random(0)
+        boxes = []
+        for _ in range(60):
+            x1, y1 = rng.uniform(0, 500), rng.uniform(0, 800)
+            boxes.append(((x1, y1, x1 + rng.uniform(5, 200), y1 + rng.uniform(5, 150)), rng.random(), "Text"))
+        layout = self._layout(*boxes)
+        scalar = self._boxes(self.analyzer._resolve_overlaps(layout, scalar_below=len(boxes) + 1))
+        vectorized = self._boxes(self.analyzer._resolve_overlaps(layout, scalar_below=0))
+        self.assertEqual(scalar, vectorized)
+        self.assertGreater(len(scalar), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
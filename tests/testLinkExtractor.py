@@ -1,9 +1,10 @@
 import os
+import re
 import sys
 import unittest
 import fitz
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
-from config.model_config import _URL_RE
+from config.model_config import _URL_RE, _URL_PATTERN
 from page.extractors import LinkExtractor, TextExtractor
 
 
@@ -13,9 +14,9 @@ class TestLinkExtractor(unittest.TestCase):
         last_page = doc[-1]
         text_dict = TextExtractor(last_page).get_text_dict()
         link_extractor = LinkExtractor(last_page)
-        links = list(link_extractor._iter_link_annotations(text_dict))
+        pairs = [(link["text"], link["uri"]) for link in link_extractor._iter_link_annotations(text_dict)]
         doc.close()
-        return [(link["text"], link["uri"]) for link in links]
+        return pairs
 
     def test_iter_link_annotations(self):
         pdf_path = os.path.join(os.path.dirname(__file__), "testData", "dataLinks", "threeLinks.pdf")
@@ -119,6 +120,20 @@ class TestLinkExtractor(unittest.TestCase):
         self.assertEqual(len(urls), 1)
         self.assertEqual(urls[0]["uri"], "https://example.com")
 
+    def test_url_stops_at_unicode_spaces(self):
+        try:
+            import re2
+        except ImportError:
+            re2 = None
+        backends = {"re": re.compile(_URL_PATTERN), "module": _URL_RE}
+        if re2 is not None:
+            backends["re2"] = re2.compile(_URL_PATTERN)
+        for name, rx in backends.items():
+            for space in ("\xa0", "\u2009", "\u3000", "\u2028"):
+                with self.subTest(backend=name, space=hex(ord(space))):
+                    m = rx.search(f"см. https://example.com/docs{space}далее")
+                    self.assertEqual("https://example.com/docs", m.group(0))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,70 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import fitz
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from page.extractors import ImageExtractor
+from page.page import Page
+
+
+class TestPage(unittest.TestCase):
+    def setUp(self):
+        data_dir = os.path.join(os.path.dirname(__file__), "testData")
+        self.pdf_paths = [
+            os.path.join(data_dir, "dataText", "copyTwoText.pdf"),
+            os.path.join(data_dir, "dataImages", "threeImage.pdf"),
+        ]
+
+    @staticmethod
+    def _strip_image_dirs(results):
+        for res in results:
+            for img in res.get("images", []):
+                img["path"] = os.path.basename(img["path"])
+        return results
+
+    def test_analyze_pages_parallel_matches_serial(self):
+        for pdf_path in self.pdf_paths:
+            with self.subTest(pdf=os.path.basename(pdf_path)), tempfile.TemporaryDirectory() as tmp:
+                with fitz.open(pdf_path) as doc:
+                    serial = [Page(pdf_path, i, doc).analyze_page(doc, os.path.join(tmp, "serial")) for i in range(doc.page_count)]
+                parallel = Page.analyze_pages_parallel(pdf_path, images_dir=os.path.join(tmp, "parallel"), num_workers=2)
+                self.assertEqual(self._strip_image_dirs(serial), self._strip_image_dirs(parallel))
+
+    def test_analyze_pages_parallel_keeps_order_and_errors(self):
+        pdf_path = self.pdf_paths[0]
+        with tempfile.TemporaryDirectory() as tmp:
+            results = Page.analyze_pages_parallel(pdf_path, [2, 9, 0], images_dir=tmp, num_workers=2)
+        self.assertEqual(2, results[0]["page_number"])
+        self.assertIn("__error__", results[1])
+        self.assertEqual(9, results[1]["page_number"])
+        self.assertEqual(0, results[2]["page_number"])
+        self.assertEqual([], Page.analyze_pages_parallel(pdf_path, []))
+
+    def test_extract_all_images_batches_and_feeds_images(self):
+        pdf_path = self.pdf_paths[1]
+        self.addCleanup(Page.clear_image_batches)
+        with tempfile.TemporaryDirectory() as tmp:
+            with fitz.open(pdf_path) as doc:
+                expected = [ImageExtractor(page).extract_images(os.path.join(tmp, "ref")) for page in doc]
+            out_dir = os.path.join(tmp, "batch")
+            batches = Page.extract_all_images(pdf_path, out_dir, batch_size=1)
+            strip = lambda pages: [[{**img, "path": os.path.basename(img["path"])} for img in images] for images in pages]
+            self.assertEqual(strip(expected), strip(batches))
+            batches = Page.extract_all_images(pdf_path, out_dir)
+            self.assertEqual(strip(expected), strip(batches))
+            self.assertTrue(batches[0])
+
+            with mock.patch.object(ImageExtractor, "extract_images") as extract, Page(pdf_path, 0) as page:
+                self.assertIs(batches[0], page.images(out_dir))
+                extract.assert_not_called()
+                page.images(os.path.join(tmp, "other"))
+                extract.assert_called_once()
+
+        with self.assertRaises(ValueError):
+            Page.extract_all_images(pdf_path, batch_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import hashlib
+import tempfile
+import unittest
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from document import Document, PageCache
+from page.page import Page
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = PageCache(os.path.join(self._tmp.name, "cache.db"))
+        self.params = dict(resolved=True, weights_dir="weights", images_dir="images")
+
+    def tearDown(self):
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def test_round_trip(self):
+        result = {"page_number": 1, "text_blocks": [{"id": "b1", "text": "Текст", "bbox": [0.5, 1.0, 2.0, 3.0]}], "links": []}
+        self.cache.put_page("h", 1, result, **self.params)
+        self.cache.put_page("h", 0, {"page_number": 0}, **self.params)
+        self.assertEqual({0: {"page_number": 0}, 1: result}, self.cache.get_pages("h", **self.params))
+
+    def test_miss_on_changed_parameters(self):
+        self.cache.put_page("h", 0, {"page_number": 0}, **self.params)
+        changes = {
+            "hash": ("other", self.params),
+            "resolved": ("h", dict(self.params, resolved=False)),
+            "weights_dir": ("h", dict(self.params, weights_dir="other_weights")),
+            "images_dir": ("h", dict(self.params, images_dir="other_images")),
+        }
+        for name, (pdf_hash, params) in changes.items():
+            with self.subTest(changed=name):
+                self.assertEqual({}, self.cache.get_pages(pdf_hash, **params))
+
+    def test_weights_ignored_without_resolved(self):
+        params = dict(self.params, resolved=False)
+        self.cache.put_page("h", 0, {"page_number": 0}, **params)
+        self.assertEqual({0: {"page_number": 0}}, self.cache.get_pages("h", **dict(params, weights_dir="other_weights")))
+
+    def test_clear(self):
+        self.cache.put_page("h", 0, {"page_number": 0}, **self.params)
+        self.cache.clear()
+        self.assertEqual({}, self.cache.get_pages("h", **self.params))
+
+    def test_file_hash(self):
+        path = os.path.join(self._tmp.name, "data.bin")
+        data = os.urandom(3000)
+        with open(path, "wb") as f:
+            f.write(data)
+        expected = hashlib.sha256(data).hexdigest()
+        self.assertEqual(expected, PageCache.file_hash(path))
+        self.assertEqual(expected, PageCache.file_hash(path, chunk_size=7))
+
+    def test_document_uses_cache(self):
+        pdf_path = os.path.join(os.path.dirname(__file__), "testData", "dataText", "copyTwoText.pdf")
+        images_dir = os.path.join(self._tmp.name, "images")
+        with Document(pdf_path) as doc:
+            first = list(doc.iter_pages(images_dir, workers=1, cache=self.cache))
+        with mock.patch.object(Page, "analyze_page", autospec=True) as analyze_page:
+            with Document(pdf_path) as doc:
+                second = list(doc.iter_pages(images_dir, workers=1, cache=self.cache))
+            analyze_page.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(list(range(len(first))), [p["page_number"] for p in second])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from PIL import Image
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from document import Document, ParallelProcessor
+from document import parallel_processor
+from utils.utils import dumps_json, loads_json
+
+SHM_DIR = "/dev/shm"
+
+
+class TestParallelProcessor(unittest.TestCase):
+    pdf_path = os.path.join(os.path.dirname(__file__), "testData", "dataText", "copyTwoText.pdf")
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.images_dir = os.path.join(self._tmp.name, "images")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _segments(self):
+        return set(os.listdir(SHM_DIR)) if os.path.isdir(SHM_DIR) else set()
+
+    def _serial(self):
+        with Document(self.pdf_path) as doc:
+            return loads_json(dumps_json(doc.analyze_document(self.images_dir, workers=1)))
+
+    def test_shared_payload_round_trip(self):
+        payload = "Текст страницы".encode("utf-8") * 100
+        name, data = parallel_processor._put_payload(payload)
+        self.assertEqual(payload, parallel_processor._take_payload(name, data))
+        if name is not None:
+            self.assertNotIn(name.lstrip("/"), self._segments())
+
+    def test_payload_without_shared_memory(self):
+        with mock.patch.object(parallel_processor, "_USE_SHARED_MEMORY", False):
+            self.assertEqual((None, b"abc"), parallel_processor._put_payload(b"abc"))
+        self.assertEqual(b"abc", parallel_processor._take_payload(None, b"abc"))
+
+    def test_shared_image_round_trip(self):
+        img = Image.new("RGBA", (7, 5), (10, 20, 30, 128))
+        shared = parallel_processor._put_shared_image(img)
+        restored = parallel_processor._take_shared_image(*shared)
+        self.assertEqual("RGB", restored.mode)
+        self.assertEqual((7, 5), restored.size)
+        self.assertEqual(img.convert("RGB").tobytes(), restored.tobytes())
+
+    def test_parallel_pages_match_serial(self):
+        before = self._segments()
+        with ParallelProcessor(2) as processor:
+            parallel = processor.analyze_document_parallel_pages(self.pdf_path, self.images_dir)
+        self.assertEqual(self._serial(), parallel)
+        self.assertEqual(set(), self._segments() - before)
+
+    def test_failed_pages_do_not_abort_the_batch(self):
+        before = self._segments()
+        with ParallelProcessor(2) as processor:
+            results = processor.analyze_document_parallel_pages(self.pdf_path, self.images_dir, include_errors=True, num_pages=5)
+        self.assertEqual(self._serial(), results[:3])
+        self.assertEqual([3, 4], [r["page_number"] for r in results[3:]])
+        self.assertTrue(all(r["__error__"].startswith("IndexError") and r["traceback"] is None for r in results[3:]))
+        self.assertEqual(set(), self._segments() - before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+import unittest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from report import Reporter
+
+
+class TestReporter(unittest.TestCase):
+    pdf_path = os.path.join(os.path.dirname(__file__), "testData", "dataImages", "threeImage.pdf")
+
+    def _doc_json(self):
+        return [{
+            "page_number": 0,
+            "text_blocks": [{"id": "b1", "text": "См. Приложение 1", "bbox": [0, 0, 100, 20]}],
+            "tables": [],
+            "links": [{"text": "Сайт", "uri": "https://example.com"}],
+            "image_captions": [],
+            "images": [{"id": "img_p0_1"}, {"id": "img_p0_2"}],
+        }]
+
+    def test_get_report(self):
+        expected = os.linesep.join([
+            "Некорректные приложения на страницах: [0]",
+            "Проблемы с подписями к изображениям на страницах: ['0 (отсутствуют подписи к 2 изображению/ям)']",
+        ])
+        report = Reporter().get_report(self.pdf_path, self._doc_json())
+        self.assertEqual(expected, report)
+        self.assertNotIn("Номера страниц отсутствуют", report)
+
+    def test_save_report_matches_get_report(self):
+        reporter = Reporter()
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, "report.txt")
+            reporter.save_report(self.pdf_path, self._doc_json(), out)
+            with open(out, encoding="utf-8", newline="") as f:
+                self.assertEqual(reporter.get_report(self.pdf_path, self._doc_json()), f.read())
+
+    def test_detailed_report(self):
+        report = Reporter().get_detailed_report(self.pdf_path, self._doc_json())
+        self.assertFalse(report["all_ok"])
+        self.assertEqual([True], report["page_numbers_results"])
+        self.assertEqual([-1], report["appendices_results"])
+        self.assertEqual([{"page_number": 0, "ok": False, "captions": 0, "images": 2, "missing_captions": 2}], report["captions_results"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import os
+import sys
+import unittest
+from unittest import mock
+import fitz
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from page.extractors import PageContentCache, TitleExtractor
+
+
+class TestTitleExtractor(unittest.TestCase):
+    def _titles(self, next_page_text: str):
+        doc = fitz.open()
+        for line in ("Page one", "Page two"):
+            doc.new_page().insert_text((72, 72), line)
+        texts = {0: "Содержание Введение", 1: next_page_text}
+        with mock.patch.object(PageContentCache, "text", autospec=True, side_effect=lambda cache, *args: texts[cache.page.number]):
+            extractor = TitleExtractor(doc[0])
+            extractor.collect_toc_candidates_on_page()
+        doc.close()
+        return extractor.titles
+
+    def test_next_page_with_appendix(self):
+        self.assertEqual(["Page one", "Page two"], self._titles("Приложение А"))
+
+    def test_next_page_with_inflected_appendix(self):
+        for text in ("Перечень приложений", "Работа с приложением", "Список приложения"):
+            with self.subTest(text=text):
+                self.assertEqual(["Page one"], self._titles(text))
+
+
+if __name__ == "__main__":
+    unittest.main()
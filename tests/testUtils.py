@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import fitz
+import numpy as np
+from PIL import Image
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils import utils
+
+
+class TestSaveImagesAsPdf(unittest.TestCase):
+    def test_one_page_per_image(self):
+        images = [Image.new("RGB", (200, 100), "red"), Image.new("L", (100, 300), 128)]
+        with tempfile.TemporaryDirectory() as tmp:
+            out_path = os.path.join(tmp, "out.pdf")
+            self.assertEqual(2, utils.save_images_as_pdf(images, out_path, resolution=72.0))
+            with fitz.open(out_path) as doc:
+                self.assertEqual([(200, 100), (100, 300)], [(round(p.rect.width), round(p.rect.height)) for p in doc])
+                self.assertEqual([1, 1], [len(p.get_images()) for p in doc])
+
+    def test_resolution_sets_page_size(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out_path = os.path.join(tmp, "out.pdf")
+            utils.save_images_as_pdf(iter([Image.new("RGB", (200, 100))]), out_path, resolution=144.0)
+            with fitz.open(out_path) as doc:
+                self.assertEqual((100, 50), (round(doc[0].rect.width), round(doc[0].rect.height)))
+
+    def test_empty_input(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out_path = os.path.join(tmp, "out.pdf")
+            with self.assertRaises(ValueError):
+                utils.save_images_as_pdf([], out_path)
+            self.assertFalse(os.path.exists(out_path))
+
+
+class TestJson(unittest.TestCase):
+    def setUp(self):
+        self.obj = {
+            "text": "Текст «в кавычках»",
+            1: [np.float64(0.5), np.int64(3)],
+            "bbox": np.array([1.0, 2.0, 3.5, 4.0]),
+            "nested": {"ok": True, "none": None},
+        }
+        self.expected = {
+            "text": "Текст «в кавычках»",
+            "1": [0.5, 3],
+            "bbox": [1.0, 2.0, 3.5, 4.0],
+            "nested": {"ok": True, "none": None},
+        }
+
+    def test_round_trip(self):
+        data = utils.dumps_json(self.obj)
+        self.assertIsInstance(data, bytes)
+        self.assertIn("Текст".encode("utf-8"), data)
+        self.assertEqual(self.expected, utils.loads_json(data))
+
+    def test_round_trip_without_orjson(self):
+        with mock.patch.object(utils, "orjson", None):
+            data = utils.dumps_json(self.obj)
+            self.assertNotIn(b" ", data.replace("Текст «в кавычках»".encode("utf-8"), b""))
+            self.assertEqual(self.expected, utils.loads_json(data))
+
+
+if __name__ == "__main__":
+    unittest.main()